@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# animate.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Parameter-sweep animations
+# Renders one frame per value of the swept parameters of a tree or seashell, to
+# numbered PNGs or to a video through matplotlib's animation writers:
+#
+#   python animate.py tree --sweep branch_angle 0.3 1.2 --frames 90 -o frames/
+#   python animate.py seashell --sweep thickness 0.02 0.2 --frames 60 -o shell.mp4 --workers 4
+#
+# The figure and its collection are built once per worker process. Each frame
+# regenerates the geometry into the previous frame's arrays when the topology (depth,
+# number of points) is unchanged, and moves the collection's vertices in place instead
+# of calling plot() again. Frames are rendered in contiguous chunks across worker
+# processes; the axis limits span the whole sweep so that the chunks line up.
+# =====================
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+from fractal_tree import FractalTree3D
+from instrument import progress, timed
+from seashell import DoubleSeashell
+
+KINDS = ("tree", "seashell")
+
+# Video writers of matplotlib.animation by file extension.
+WRITERS = {".mp4": "ffmpeg", ".gif": "pillow"}
+
+
+def sweep_frames(sweep):
+    """
+    Turns {name: values} into a list with one {name: value} dictionary per frame.
+    """
+    lengths = {len(values) for values in sweep.values()}
+    if len(lengths) != 1 or 0 in lengths:
+        raise ValueError("Every swept parameter needs the same, non-zero number of values")
+    count = lengths.pop()
+    return [{name: values[i] for name, values in sweep.items()} for i in range(count)]
+
+
+def _build(kind, params):
+    if kind == "tree":
+        params = dict(params)
+        for key in ("base", "direction"):
+            params[key] = np.asarray(params[key], dtype=float)
+        return FractalTree3D(**params)
+    if kind == "seashell":
+        if params.get("mode", "points") != "points":
+            raise ValueError("Seashell sweeps only support points mode")
+        return DoubleSeashell(**params)
+    raise ValueError(f"Unknown kind {kind!r}; expected one of {KINDS}")
+
+
+class SweepRenderer:
+    def __init__(self, kind, params, sweep, figsize=(8, 6), dpi=100, plot=None, limits=None):
+        """
+        Renders the frames of a parameter sweep on one reused figure.
+
+        Parameters:
+        - kind: "tree" or "seashell".
+        - params: Constructor parameters shared by all frames.
+        - sweep: {parameter name: sequence of values}, one value per frame.
+        - figsize, dpi: Size and resolution of the frames.
+        - plot: Keyword arguments for the fractal's plot() method.
+        - limits: Optional ((xmin, xmax), (ymin, ymax), (zmin, zmax)) of the axes;
+          computed from the whole sweep if None.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind {kind!r}; expected one of {KINDS}")
+        self.kind = kind
+        self.params = dict(params)
+        self.frames = sweep_frames(sweep)
+        self.figsize = tuple(figsize)
+        self.dpi = dpi
+        self.plot = dict(plot or {})
+        if kind == "tree":
+            self.plot["set_limits"] = False
+        self._limits = limits
+        self.figure = None
+        self._fractal = None
+        self._shape = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def limits(self):
+        """
+        Returns axis limits enclosing every frame, from cheap previews of each frame
+        (the first levels of the tree, a coarse seashell) padded by 5%.
+        """
+        if self._limits is None:
+            lower, upper = np.full(3, np.inf), np.full(3, -np.inf)
+            for frame in self.frames:
+                params = {**self.params, **frame}
+                if self.kind == "tree":
+                    params["depth"] = min(params["depth"], 5)
+                    tree = _build(self.kind, params)
+                    tree.generate_points()
+                    points = np.concatenate([tree.starts, tree.ends])
+                else:
+                    params["points"] = min(params.get("points", 1000), 256)
+                    shell = _build(self.kind, params)
+                    shell.generate_points()
+                    # plot() draws (z, x, y) on the (x, y, z) axes.
+                    points = np.stack([shell.z_shell, shell.x_shell, shell.y_shell], axis=1)
+                if len(points):
+                    lower, upper = np.minimum(lower, points.min(axis=0)), np.maximum(upper, points.max(axis=0))
+            pad = 0.05 * np.maximum(upper - lower, 1e-9)
+            self._limits = tuple(zip((lower - pad).tolist(), (upper + pad).tolist()))
+        return self._limits
+
+    def _setup(self):
+        self.figure = Figure(figsize=self.figsize, dpi=self.dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111, projection='3d')
+
+    def _apply_limits(self):
+        (x0, x1), (y0, y1), (z0, z1) = self.limits()
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(y0, y1)
+        self.ax.set_zlim(z0, z1)
+
+    def _in_place(self):
+        # Twigs and LOD culling change the number of drawn artists or segments per frame.
+        return self.kind == "seashell" or (self.plot.get("twig_length") is None
+                                           and self.plot.get("lod_threshold") is None)
+
+    def draw(self, index):
+        """
+        Brings the figure up to date with frame `index`.
+        """
+        if self.figure is None:
+            self._setup()
+        frame = self.frames[index]
+        if self._fractal is None:
+            self._fractal = _build(self.kind, {**self.params, **frame})
+        else:
+            for name, value in frame.items():
+                setattr(self._fractal, name, np.asarray(value, dtype=float) if name in ("base", "direction")
+                        else value)
+        self._fractal.generate_points(reuse=True)
+
+        if self.kind == "tree":
+            shape = len(self._fractal.starts)
+        else:
+            shape = len(self._fractal.x_shell)
+        if shape == self._shape and self._in_place():
+            self._update_artists()
+        else:
+            for artist in list(self.ax.collections):
+                artist.remove()
+            self._fractal.plot(ax=self.ax, **self.plot)
+            self._apply_limits()
+            self._shape = shape
+            self._segments = None
+
+    def _update_artists(self):
+        collection = self.ax.collections[0]
+        if self.kind == "tree":
+            tree = self._fractal
+            if self._segments is None:
+                self._segments = np.empty((len(tree.starts), 2, 3))
+            self._segments[:, 0] = tree.starts
+            self._segments[:, 1] = tree.ends
+            collection.set_segments(self._segments)
+        else:
+            shell = self._fractal
+            collection.set_offsets(np.stack([shell.z_shell, shell.x_shell], axis=1))
+            collection.set_3d_properties(shell.y_shell, 'z')
+
+    @timed("sweep.frame")
+    def rgba(self, index):
+        """
+        Renders frame `index` and returns it as a (height, width, 4) uint8 array.
+        """
+        self.draw(index)
+        self.figure.canvas.draw()
+        return np.asarray(self.figure.canvas.buffer_rgba()).copy()
+
+    @timed("sweep.frame")
+    def save(self, index, path):
+        """
+        Renders frame `index` to an image file.
+        """
+        self.draw(index)
+        self.figure.savefig(path, dpi=self.dpi)
+
+
+# Renderer of the current worker process, built once by _init_worker().
+_worker = None
+
+
+def _init_worker(spec):
+    global _worker
+    _worker = SweepRenderer(*spec)
+
+
+def _render_chunk(task):
+    """
+    Renders a contiguous range of frames on the worker's renderer, to PNG files in
+    `directory`, or to RGBA arrays when it is None.
+    """
+    frames, directory = task
+    if directory is None:
+        return [_worker.rgba(index) for index in frames]
+    paths = [os.path.join(directory, f"frame_{index:05d}.png") for index in frames]
+    for index, path in zip(frames, paths):
+        _worker.save(index, path)
+    return paths
+
+
+def render_sweep(kind, params, sweep, output, figsize=(8, 6), dpi=100, plot=None, workers=1, fps=24,
+                 chunk_frames=None):
+    """
+    Renders a parameter sweep to numbered PNGs or to a video.
+
+    Parameters:
+    - kind, params, sweep, figsize, dpi, plot: As for SweepRenderer.
+    - output: A directory for frame_00000.png, frame_00001.png, ..., or a .mp4 (needs
+      ffmpeg) or .gif file.
+    - workers: Number of processes rendering frames.
+    - fps: Frame rate of a video.
+    - chunk_frames: Frames rendered per task; by default the frames are split into
+      about four tasks per worker.
+
+    Returns:
+    - The list of PNG paths, or the video path.
+    """
+    renderer = SweepRenderer(kind, params, sweep, figsize, dpi, plot)
+    spec = (kind, params, sweep, figsize, dpi, plot, renderer.limits())
+    total = len(renderer)
+    if chunk_frames is None:
+        chunk_frames = max(1, -(-total // (4 * workers)))
+    extension = os.path.splitext(output)[1].lower()
+    video = extension in WRITERS
+    if extension and not video:
+        raise ValueError(f"Output must be a directory or a file ending in one of {tuple(WRITERS)}")
+    if video:
+        from matplotlib import animation
+        if not animation.writers.is_available(WRITERS[extension]):
+            raise RuntimeError(f"The {WRITERS[extension]!r} movie writer needed for {extension} is not available")
+    else:
+        os.makedirs(output, exist_ok=True)
+    tasks = [(range(lo, min(lo + chunk_frames, total)), None if video else output)
+             for lo in range(0, total, chunk_frames)]
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,))
+        chunks = executor.map(_render_chunk, tasks)
+    else:
+        executor = None
+        _init_worker(spec)
+        chunks = map(_render_chunk, tasks)
+    try:
+        if video:
+            _write_video(chunks, output, WRITERS[extension], figsize, dpi, fps, total)
+            return output
+        paths = []
+        for chunk in chunks:
+            paths.extend(chunk)
+            progress("sweep.render", len(paths), total)
+        return paths
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _write_video(chunks, output, writer_name, figsize, dpi, fps, total):
+    """
+    Streams rendered frames, chunk by chunk in order, into a matplotlib movie writer
+    through a figure showing one full-size image.
+    """
+    from matplotlib import animation
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    image = None
+    writer = animation.writers[writer_name](fps=fps)
+    done = 0
+    with writer.saving(figure, output, dpi):
+        for chunk in chunks:
+            for frame in chunk:
+                if image is None:
+                    image = figure.figimage(frame)
+                else:
+                    image.set_data(frame)
+                writer.grab_frame()
+            done += len(chunk)
+            progress("sweep.render", done, total)
+
+
+def _value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render an animation that sweeps fractal parameters.")
+    parser.add_argument("kind", choices=KINDS, help="Fractal to animate")
+    parser.add_argument("--sweep", nargs=3, action="append", required=True, metavar=("NAME", "START", "STOP"),
+                        help="Parameter swept linearly from START to STOP; may be repeated")
+    parser.add_argument("--set", nargs=2, action="append", default=[], metavar=("NAME", "VALUE"),
+                        help="Fixed parameter, as a JSON value; may be repeated")
+    parser.add_argument("--frames", type=int, default=60, help="Number of frames")
+    parser.add_argument("-o", "--output", required=True, help="Directory for PNG frames, or a .mp4 or .gif file")
+    parser.add_argument("--fps", type=int, default=24, help="Frame rate of a video")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--dpi", type=int, default=100, help="Resolution in dots per inch")
+    parser.add_argument("--figsize", type=float, nargs=2, metavar=("WIDTH", "HEIGHT"), default=None,
+                        help="Figure size in inches")
+    args = parser.parse_args(argv)
+
+    # The command line shares cli.py's defaults; imported here as it selects the Agg backend.
+    from cli import DEFAULTS
+    defaults = DEFAULTS[args.kind]
+    params = {**defaults["params"], **{name: _value(value) for name, value in args.set}}
+    sweep = {}
+    for name, start, stop in args.sweep:
+        values = np.linspace(float(start), float(stop), args.frames)
+        # Integer parameters (depth, n_turns, points) are swept over whole numbers.
+        sweep[name] = np.round(values).astype(int).tolist() if isinstance(params.get(name), int) else values
+    result = render_sweep(args.kind, params, sweep, args.output, tuple(args.figsize or defaults["figsize"]),
+                          args.dpi, defaults["plot"], args.workers, args.fps)
+    print(result if isinstance(result, str) else f"{len(result)} frames written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
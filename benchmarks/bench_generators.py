@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# benchmarks/bench_generators.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Generator and plot benchmarks
+# Measures wall time, throughput (points or branches per second) and peak memory of
+# every generator and plot path over a sweep of sizes, starting at the sizes main.py
+# uses:
+#
+#   python benchmarks/bench_generators.py --output baseline.json
+#   python benchmarks/bench_generators.py --compare baseline.json --threshold 0.25
+#
+# Each case runs in a fresh worker process, so its peak RSS is not inflated by earlier
+# cases. Wall time is the best of --repeat runs; peak memory is measured on a separate
+# run under tracemalloc (which also tracks NumPy buffers), so tracing does not skew
+# the timings. --compare exits with status 1 when a case is slower or uses more peak
+# memory than the baseline by more than the threshold.
+# =====================
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+from seashell import DoubleSeashell
+
+SEASHELL_PARAMS = dict(a=0.1, b=0.2, c=0.15, n_turns=10, n_turns_inv=5, thickness=0.05)
+TREE_PARAMS = dict(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                   branch_angle=np.pi / 4, scale_factor=0.5)
+
+
+def _fern(size, engine="numpy"):
+    return FractalFern(size, engine=engine, seed=0)
+
+
+def _tree(size, engine="vectorized"):
+    return FractalTree3D(depth=size, engine=engine, **TREE_PARAMS)
+
+
+def _seashell(size):
+    return DoubleSeashell(points=size, **SEASHELL_PARAMS)
+
+
+def _generate(make, **kwargs):
+    def setup(size):
+        fractal = make(size, **kwargs)
+        return fractal.generate_points
+    return setup
+
+
+def _tree_recursive(size):
+    tree = _tree(size, engine="recursive")
+
+    def run():
+        tree._recursive_branches = []
+        tree._generate_recursive(tree.base, tree.length, tree.direction, tree.depth)
+    return run
+
+
+def _tree_instanced(size):
+    tree = _tree(size)
+    return tree.instanced
+
+
+def _plot(make, projection=None, **plot_kwargs):
+    def setup(size):
+        fractal = make(size)
+        fractal.generate_points()
+
+        def run():
+            fig = plt.figure()
+            ax = fig.add_subplot(111, projection=projection)
+            fractal.plot(ax=ax, **plot_kwargs)
+            fig.canvas.draw()
+            plt.close(fig)
+        return run
+    return setup
+
+
+def _seashell_items(size):
+    return 2 * size * 10
+
+
+# Benchmark cases: name -> (setup(size) returning the timed callable, sizes,
+# items(size) processed per run, unit of the items). Sizes start at main.py's values.
+CASES = {
+    "fern.generate.numpy": (_generate(_fern), [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7], lambda n: n, "points"),
+    "fern.generate.python": (_generate(_fern, engine="python"), [10 ** 4, 10 ** 5], lambda n: n, "points"),
+    "fern.plot": (_plot(_fern), [10 ** 4, 10 ** 5, 10 ** 6], lambda n: n, "points"),
+    "tree.generate": (_generate(_tree), list(range(4, 11)), FractalTree3D.branch_count, "branches"),
+    "tree.generate_recursive": (_tree_recursive, list(range(4, 9)), FractalTree3D.branch_count, "branches"),
+    "tree.instanced": (_tree_instanced, list(range(4, 15)), FractalTree3D.branch_count, "branches"),
+    "tree.plot": (_plot(_tree, "3d"), list(range(4, 9)), FractalTree3D.branch_count, "branches"),
+    "tree.plot.lod": (_plot(_tree, "3d", lod_threshold=1), list(range(4, 11)), FractalTree3D.branch_count,
+                      "branches"),
+    "seashell.generate": (_generate(_seashell), [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], _seashell_items, "points"),
+    "seashell.plot": (_plot(_seashell, "3d"), [10 ** 3, 10 ** 4], _seashell_items, "points"),
+}
+
+# Largest size of each case run with --quick.
+QUICK_LIMITS = {"fern": 10 ** 5, "tree": 7, "seashell": 10 ** 4}
+
+
+def run_case(name, size, repeat):
+    """
+    Runs one case in the current process and returns its measurements.
+    """
+    setup, _, items, unit = CASES[name]
+    best = float("inf")
+    for _ in range(repeat):
+        run = setup(size)
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    run = setup(size)
+    tracemalloc.start()
+    run()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = items(size)
+    return {
+        "case": name, "size": size, "items": count, "unit": unit, "wall_s": best,
+        "rate_per_s": count / best if best > 0 else None,
+        "tracemalloc_peak_mb": traced_peak / 2 ** 20,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10),
+    }
+
+
+def _isolated(args):
+    return run_case(*args)
+
+
+def run_benchmarks(names, quick=False, repeat=3, stream=sys.stdout):
+    """
+    Runs the selected cases, each size in a fresh worker process.
+
+    Returns:
+    - A dictionary mapping "case[size]" to the measurements of run_case().
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        _, sizes, _, _ = CASES[name]
+        limit = QUICK_LIMITS[name.split(".")[0]] if quick else None
+        for size in sizes:
+            if limit is not None and size > limit:
+                continue
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                result = pool.apply(_isolated, ((name, size, repeat),))
+            results[f"{name}[{size}]"] = result
+            print(f"{name:<26} {size:>10} {result['wall_s']:>10.4f}s {result['rate_per_s']:>14.0f} "
+                  f"{result['unit']}/s  rss {result['rss_peak_mb']:>8.1f} MB  "
+                  f"traced {result['tracemalloc_peak_mb']:>8.1f} MB", file=stream)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline.
+
+    Returns:
+    - A list of human-readable regressions: cases whose wall time or peak memory grew by
+      more than `threshold` (a fraction, e.g. 0.25 for 25%).
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in ("wall_s", "rss_peak_mb", "tracemalloc_peak_mb"):
+            old, new = reference.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{key}: {metric} {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _metadata():
+    return {"python": platform.python_version(), "numpy": np.__version__, "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fractal generators and plot paths.")
+    parser.add_argument("--output", help="Write the results to this JSON baseline file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare the results against a JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown or memory growth reported as a regression (default 0.25)")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Only run the smaller sizes of each sweep")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best is kept")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.filter in name]
+    results = run_benchmarks(names, quick=args.quick, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": _metadata(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
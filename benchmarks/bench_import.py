@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# benchmarks/bench_import.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Import-time benchmark
+# Measures how long a fresh interpreter takes to import the geometry modules, and checks
+# that doing so does not load matplotlib:
+#
+#   python benchmarks/bench_import.py --limit 0.1
+#
+# NumPy is a hard dependency of every generator, so its own import time is measured
+# separately and reported alongside the time the core modules add on top of it. The
+# rendering module (which pulls in matplotlib) is timed for comparison. --limit exits
+# with status 1 when the core modules add more than that many seconds beyond NumPy,
+# or when any of them imports matplotlib.
+# =====================
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = ("ifs", "fractal_fern", "fractal_tree", "seashell", "cache", "sinks", "export", "instrument")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import numpy
+after_numpy = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+end = time.perf_counter()
+print(after_numpy - start, end - after_numpy, "matplotlib" in sys.modules)
+"""
+
+
+def measure(modules, repeat=5):
+    """
+    Imports `modules` in `repeat` fresh interpreters.
+
+    Returns:
+    - A dictionary with the best NumPy import time, the best time the modules add on top
+      of it (both in seconds), and whether any run ended up with matplotlib loaded.
+    """
+    numpy_s, modules_s, matplotlib_loaded = [], [], False
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(modules=tuple(modules))],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        numpy_s.append(float(out[0]))
+        modules_s.append(float(out[1]))
+        matplotlib_loaded |= out[2] == "True"
+    return {"numpy_s": min(numpy_s), "modules_s": min(modules_s), "matplotlib_loaded": matplotlib_loaded}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the geometry modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement; the best is kept")
+    parser.add_argument("--limit", type=float, default=None,
+                        help="Fail when the core modules add more than this many seconds beyond NumPy")
+    args = parser.parse_args(argv)
+
+    core = measure(CORE_MODULES, args.repeat)
+    rendering = measure(("rendering",), args.repeat)
+    print(f"numpy          {core['numpy_s'] * 1000:>8.1f} ms")
+    print(f"core modules   {core['modules_s'] * 1000:>8.1f} ms beyond numpy  "
+          f"(matplotlib loaded: {core['matplotlib_loaded']})")
+    print(f"rendering      {rendering['modules_s'] * 1000:>8.1f} ms beyond numpy")
+
+    failed = core["matplotlib_loaded"]
+    if args.limit is not None and core["modules_s"] > args.limit:
+        print(f"core import time exceeds {args.limit * 1000:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
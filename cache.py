@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# cache.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Geometry cache
+# Stores generated geometry on disk, keyed by a hash of the generator's class, the
+# parameters that determine its output (including the seed) and ENGINE_VERSION, so
+# repeated renders with the same geometry skip generation. Entries are directories of
+# .npy files, loaded memory-mapped on a hit. When the cache grows past its byte limit
+# the least recently used entries are evicted.
+# =====================
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Bump whenever a generator's output for the same parameters changes, so that stale
+# entries are never returned.
+ENGINE_VERSION = 1
+
+
+def _jsonable(value):
+    """
+    Converts parameter values (numpy arrays and scalars, tuples) into plain JSON types.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+class GeometryCache:
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Initializes the GeometryCache object.
+
+        Parameters:
+        - directory: Directory holding the cache entries; created if missing.
+        - max_bytes: Size above which least recently used entries are evicted.
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, fractal):
+        """
+        Returns the hex digest identifying the geometry of `fractal`, or None if its output
+        is not reproducible (for example a fern drawn from an unseeded generator).
+        """
+        params = fractal._cache_params()
+        if params is None:
+            return None
+        description = {
+            "class": f"{type(fractal).__module__}.{type(fractal).__qualname__}",
+            "params": _jsonable(params),
+            "engine_version": ENGINE_VERSION,
+        }
+        encoded = json.dumps(description, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        """
+        Returns the arrays stored under `key`, memory-mapped read-only, or None on a miss.
+        A hit marks the entry as most recently used.
+        """
+        path = self._path(key)
+        try:
+            names = [name for name in os.listdir(path) if name.endswith(".npy")]
+            arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r') for name in names}
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return arrays
+
+    def store(self, key, arrays):
+        """
+        Stores a dictionary of arrays under `key`, then evicts entries past the byte limit.
+        The entry is written to a temporary directory and renamed into place, so readers
+        never see a partial entry.
+        """
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, name + ".npy"), np.asarray(array))
+            os.rename(staging, self._path(key))
+        except OSError:
+            # Another process stored the same entry first.
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def restore(self, fractal):
+        """
+        Loads the cached geometry of `fractal` into it. Returns True on a hit.
+        """
+        key = self.key(fractal)
+        arrays = self.load(key) if key is not None else None
+        if arrays is None:
+            return False
+        fractal._set_geometry(arrays)
+        return True
+
+    def save(self, fractal):
+        """
+        Stores the generated geometry of `fractal`, if its output is reproducible.
+        """
+        key = self.key(fractal)
+        if key is not None:
+            self.store(key, fractal._geometry())
+
+    def entries(self):
+        """
+        Returns (last use time, size in bytes, path) of every entry, least recently used first.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.stat(path).st_mtime, size, path))
+        return sorted(entries)
+
+    def size(self):
+        """
+        Returns the total size of the cache entries in bytes.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits within max_bytes.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# cli.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Command-line interface
+# Renders fractals without a display. Single renders are configured with flags:
+#
+#   python cli.py fern --points 1000000 -o fern.png
+#   python cli.py tree --depth 8 --elev 20 -o tree.svg
+#
+# Many renders can be listed in a JSON or TOML job file and run on a process pool:
+#
+#   python cli.py batch jobs.toml --jobs 8
+#
+# A job is a table with a "kind" ("fern", "seashell" or "tree"), an "output" path
+# (.png or .svg), and optionally "params" (constructor arguments), "plot" (plot()
+# arguments), "dpi", "figsize" and "cache_dir". The JSON file holds a list of jobs or
+# an object with a "jobs" list; the TOML file holds a [[jobs]] array of tables.
+#
+# With --cache-dir, generated geometry is kept in an on-disk GeometryCache, so jobs
+# that only change styling (colours, view angles) skip generation.
+# =====================
+
+import matplotlib
+matplotlib.use("Agg")  # Render nodes have no display; must precede any pyplot import.
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+import sys
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from cache import GeometryCache
+import instrument
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+from lod import tree_lod_depth
+from seashell import DoubleSeashell
+
+# Default parameters of each kind of render, matching main.py.
+DEFAULTS = {
+    "fern": {
+        "params": {"points": 100000, "engine": "numpy"},
+        "plot": {},
+        "figsize": (5, 7),
+    },
+    "seashell": {
+        "params": {"a": 0.1, "b": 0.2, "c": 0.15, "n_turns": 10, "n_turns_inv": 5, "thickness": 0.05,
+                   "points": 8000},
+        "plot": {},
+        "figsize": (8, 6),
+    },
+    "tree": {
+        "params": {"base": [0, 0, 0], "length": 1, "direction": [0.001, 0.001, 1], "depth": 7,
+                   "branch_angle": np.pi / 4, "scale_factor": 0.5},
+        "plot": {"view_init_elev": 10, "view_init_azim": 60},
+        "figsize": (8, 6),
+    },
+}
+
+FORMATS = (".png", ".svg")
+
+
+def _build(kind, params):
+    """
+    Creates the fractal object of the given kind from its constructor parameters.
+    """
+    if kind == "fern":
+        return FractalFern(**params)
+    if kind == "seashell":
+        return DoubleSeashell(**params)
+    if kind == "tree":
+        params = dict(params)
+        for key in ("base", "direction"):
+            params[key] = np.asarray(params[key], dtype=float)
+        return FractalTree3D(**params)
+    raise ValueError(f"Unknown kind {kind!r}; expected one of {tuple(DEFAULTS)}")
+
+
+def _new_axes(kind, figsize, dpi):
+    fig = plt.figure(figsize=figsize, dpi=dpi)
+    if kind == "fern":
+        return fig, fig.add_subplot(111)
+    return fig, fig.add_subplot(111, projection='3d')
+
+
+def render_job(job):
+    """
+    Generates, plots and saves one render.
+
+    Parameters:
+    - job: Dictionary with "kind" and "output", and optionally "params", "plot",
+      "dpi" and "figsize", which override DEFAULTS[kind], "cache_dir" and
+      "cache_max_bytes" to use a GeometryCache, and "verbose" to log timed spans.
+
+    Returns:
+    - A dictionary with the output path and the generate, plot and save times in seconds.
+    """
+    kind = job.get("kind")
+    if kind not in DEFAULTS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {tuple(DEFAULTS)}")
+    output = job.get("output")
+    if not output or os.path.splitext(output)[1].lower() not in FORMATS:
+        raise ValueError(f"Output must be a path ending in one of {FORMATS}")
+
+    defaults = DEFAULTS[kind]
+    params = {**defaults["params"], **job.get("params", {})}
+    plot_kwargs = {**defaults["plot"], **job.get("plot", {})}
+
+    if job.get("verbose"):
+        _enable_logging()
+
+    cache = None
+    if job.get("cache_dir"):
+        cache = GeometryCache(job["cache_dir"], job.get("cache_max_bytes", 1 << 30))
+
+    figsize, dpi = tuple(job.get("figsize", defaults["figsize"])), job.get("dpi", 100)
+    start = time.perf_counter()
+    fractal = _build(kind, params)
+    if kind == "tree" and plot_kwargs.get("lod_threshold") is not None:
+        # Levels too small to show at this resolution are not generated either.
+        view = (plot_kwargs["view_init_elev"], plot_kwargs["view_init_azim"])
+        lod_depth = tree_lod_depth(fractal, figsize, dpi, view, plot_kwargs["lod_threshold"])
+        fractal.depth = min(fractal.depth, lod_depth)
+    fractal.generate_points(cache=cache)
+    generated = time.perf_counter()
+
+    fig, ax = _new_axes(kind, figsize, dpi)
+    fractal.plot(ax=ax, **plot_kwargs)
+    plotted = time.perf_counter()
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(output, dpi=dpi)
+    plt.close(fig)
+    saved = time.perf_counter()
+
+    return {"kind": kind, "output": output, "generate": generated - start, "plot": plotted - generated,
+            "save": saved - plotted, "total": saved - start}
+
+
+def _enable_logging():
+    """
+    Forwards spans and progress to logging, once per (worker) process.
+    """
+    if not instrument.enabled():
+        logging.basicConfig(level=logging.INFO, format="%(processName)s %(message)s")
+        instrument.log_to()
+
+
+def load_jobs(path):
+    """
+    Reads a list of jobs from a JSON or TOML job file.
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            raise RuntimeError("TOML job files need Python 3.11 or later; use JSON instead") from None
+        with open(path, "rb") as f:
+            jobs = tomllib.load(f).get("jobs", [])
+    else:
+        with open(path) as f:
+            jobs = json.load(f)
+        if isinstance(jobs, dict):
+            jobs = jobs.get("jobs", [])
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"{path} must contain a list of jobs")
+    return jobs
+
+
+def _format_timing(result):
+    return (f"{result['kind']:<8} {result['output']}: generate {result['generate']:.3f}s, "
+            f"plot {result['plot']:.3f}s, save {result['save']:.3f}s, total {result['total']:.3f}s")
+
+
+def run_jobs(jobs, workers=1, stream=sys.stdout):
+    """
+    Runs independent jobs, on a process pool when workers > 1, and prints the timing of
+    each job as it completes (in job order).
+
+    Returns:
+    - The list of per-job results, or of exceptions for jobs that failed.
+    """
+    results = []
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(render_job, job) for job in jobs]
+            for future in futures:
+                results.append(_report(future.result, stream))
+    else:
+        for job in jobs:
+            results.append(_report(lambda: render_job(job), stream))
+    return results
+
+
+def _report(call, stream):
+    try:
+        result = call()
+    except Exception as error:
+        print(f"FAILED: {error}", file=stream)
+        return error
+    print(_format_timing(result), file=stream)
+    return result
+
+
+def _add_cache_arguments(parser):
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Log timed spans and progress of the generate, plot and export phases")
+    parser.add_argument("--cache-dir", default=None, help="Directory of the on-disk geometry cache")
+    parser.add_argument("--cache-max-bytes", type=int, default=1 << 30,
+                        help="Size above which least recently used cache entries are evicted")
+
+
+def _add_common_arguments(parser):
+    _add_cache_arguments(parser)
+    parser.add_argument("-o", "--output", required=True, help="Output file (.png or .svg)")
+    parser.add_argument("--dpi", type=int, default=100, help="Output resolution in dots per inch")
+    parser.add_argument("--figsize", type=float, nargs=2, metavar=("WIDTH", "HEIGHT"), default=argparse.SUPPRESS,
+                        help="Figure size in inches")
+
+
+# Command-line flags of each kind: (flag, type, destination, "params" or "plot", help).
+_FLAGS = {
+    "fern": [
+        ("--points", int, "points", "params", "Number of points"),
+        ("--engine", str, "engine", "params", "Engine: python or numpy"),
+        ("--seed", int, "seed", "params", "Random seed"),
+        ("--mode", str, "mode", "params", "Mode: points or density"),
+        ("--tolerance", float, "tolerance", "params",
+         "Density mode: generate until the image changes by at most this much, instead of --points"),
+        ("--workers", int, "workers", "params", "Processes used to generate the fern"),
+        ("--scale-factor", float, "scale_factor", "plot", "Scale applied to the fern's coordinates"),
+        ("--max-per-pixel", int, "max_per_pixel", "plot", "Draw at most this many points per pixel"),
+    ],
+    "seashell": [
+        ("--a", float, "a", "params", "Shape parameter a"),
+        ("--b", float, "b", "params", "Shape parameter b"),
+        ("--c", float, "c", "params", "Shape parameter c"),
+        ("--n-turns", int, "n_turns", "params", "Number of turns of the first shell"),
+        ("--n-turns-inv", int, "n_turns_inv", "params", "Number of turns of the inverse shell"),
+        ("--thickness", float, "thickness", "params", "Thickness of the shell"),
+        ("--points", int, "points", "params", "Number of points per curve"),
+        ("--ring-samples", int, "ring_samples", "params", "Number of points per cross-section ring"),
+        ("--mode", str, "mode", "params", "Mode: points or mesh"),
+        ("--max-per-pixel", int, "max_per_pixel", "plot", "Draw at most this many points per pixel"),
+    ],
+    "tree": [
+        ("--length", float, "length", "params", "Length of the trunk"),
+        ("--depth", int, "depth", "params", "Recursion depth"),
+        ("--branch-angle", float, "branch_angle", "params", "Branch angle in radians"),
+        ("--scale-factor", float, "scale_factor", "params", "Length ratio between levels"),
+        ("--elev", float, "view_init_elev", "plot", "View elevation in degrees"),
+        ("--azim", float, "view_init_azim", "plot", "View azimuth in degrees"),
+        ("--twig-length", float, "twig_length", "plot", "Collapse branches shorter than this into points"),
+        ("--lod-threshold", float, "lod_threshold", "plot",
+         "Skip subtrees that would span fewer pixels than this (and the levels they need)"),
+    ],
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render fractals to image files without a display.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for kind, flags in _FLAGS.items():
+        subparser = subparsers.add_parser(kind, help=f"Render a {kind}")
+        _add_common_arguments(subparser)
+        for flag, type_, dest, _, help_ in flags:
+            subparser.add_argument(flag, type=type_, dest=dest, default=argparse.SUPPRESS, help=help_)
+    batch = subparsers.add_parser("batch", help="Render every job listed in a JSON or TOML job file")
+    batch.add_argument("job_file", help="Path to a .json or .toml job file")
+    batch.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    _add_cache_arguments(batch)
+    return parser
+
+
+def job_from_args(args):
+    """
+    Converts the parsed arguments of a single-render subcommand into a job dictionary.
+    """
+    values = vars(args)
+    job = {"kind": args.command, "output": args.output, "dpi": args.dpi, "params": {}, "plot": {},
+           "cache_dir": args.cache_dir, "cache_max_bytes": args.cache_max_bytes, "verbose": args.verbose}
+    if "figsize" in values:
+        job["figsize"] = tuple(args.figsize)
+    for _, _, dest, section, _ in _FLAGS[args.command]:
+        if dest in values:
+            job[section][dest] = values[dest]
+    return job
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        jobs, workers = load_jobs(args.job_file), args.jobs
+        for job in jobs:
+            job.setdefault("verbose", args.verbose)
+        if args.cache_dir:
+            for job in jobs:
+                job.setdefault("cache_dir", args.cache_dir)
+                job.setdefault("cache_max_bytes", args.cache_max_bytes)
+    else:
+        jobs, workers = [job_from_args(args)], 1
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, workers)
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"{len(results) - failed}/{len(results)} jobs rendered in {time.perf_counter() - start:.3f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
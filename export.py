@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# export.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Geometry export
+# Writes fern points, seashell point clouds or meshes, and tree branch segments to
+# files for other tools:
+#
+#   .ply  binary little-endian PLY: float32 vertices, plus triangle faces for the
+#         seashell mesh or vertex1/vertex2 edges for the tree.
+#   .obj  Wavefront OBJ: "v" vertices, plus "f" faces or "l" lines.
+#   .f32  raw little-endian float32 rows (x, y for the fern; x, y, z otherwise; two
+#         points per branch for the tree).
+#
+# Geometry is streamed from the generators' iter_chunks() and each block is written
+# with a single tofile/write call, so no Python code runs per vertex.
+# =====================
+
+import os
+
+import numpy as np
+
+from instrument import progress, timed
+
+FORMATS = {".ply": "ply", ".obj": "obj", ".f32": "raw", ".raw": "raw", ".bin": "raw"}
+
+_FACE_DTYPE = np.dtype([("count", "u1"), ("indices", "<i4", (3,))])
+
+
+def _format(path, format):
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if format not in set(FORMATS.values()):
+        raise ValueError(f"Unknown export format for {path!r}; use one of {sorted(FORMATS)}")
+    return format
+
+
+def _xyz(block):
+    """
+    Converts an (n, 2) or (n, 3) block to contiguous little-endian float32 (n, 3) rows,
+    with z = 0 for 2D points.
+    """
+    xyz = np.zeros((len(block), 3), dtype='<f4')
+    xyz[:, :block.shape[1]] = block
+    return xyz
+
+
+def _ply_header(vertex_count, face_count=0, edge_count=0):
+    lines = ["ply", "format binary_little_endian 1.0", "comment generated by generate_fractals",
+             f"element vertex {vertex_count}", "property float x", "property float y", "property float z"]
+    if face_count:
+        lines += [f"element face {face_count}", "property list uchar int vertex_indices"]
+    if edge_count:
+        lines += [f"element edge {edge_count}", "property int vertex1", "property int vertex2"]
+    lines.append("end_header")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def write_ply(path, vertex_chunks, vertex_count, faces=None, edge_chunks=None, edge_count=0):
+    """
+    Writes a binary little-endian PLY file.
+
+    Parameters:
+    - path: Output file.
+    - vertex_chunks: Iterable of (n, 2) or (n, 3) vertex blocks.
+    - vertex_count: Total number of vertices in vertex_chunks.
+    - faces: Optional (m, 3) array of triangle vertex indices.
+    - edge_chunks: Optional iterable of (k, 2) vertex index blocks.
+    - edge_count: Total number of edges in edge_chunks.
+    """
+    face_count = 0 if faces is None else len(faces)
+    with open(path, "wb") as f:
+        f.write(_ply_header(vertex_count, face_count, edge_count if edge_chunks is not None else 0))
+        written = 0
+        for block in vertex_chunks:
+            _xyz(block).tofile(f)
+            written += len(block)
+            progress("export.ply", written, vertex_count)
+        if written != vertex_count:
+            raise ValueError(f"Expected {vertex_count} vertices, got {written}")
+        if face_count:
+            records = np.empty(face_count, dtype=_FACE_DTYPE)
+            records["count"] = 3
+            records["indices"] = faces
+            records.tofile(f)
+        if edge_chunks is not None:
+            for block in edge_chunks:
+                np.ascontiguousarray(block, dtype='<i4').tofile(f)
+
+
+def _obj_rows(prefix, block, spec):
+    """
+    Formats a block of rows as OBJ statements with one %-format call over the whole block.
+    """
+    if not len(block):
+        return b""
+    row = prefix + " " + " ".join([spec] * block.shape[1]) + "\n"
+    return ((row * len(block)) % tuple(block.ravel().tolist())).encode("ascii")
+
+
+def write_obj(path, vertex_chunks, faces=None, line_chunks=None):
+    """
+    Writes a Wavefront OBJ file.
+
+    Parameters:
+    - path: Output file.
+    - vertex_chunks: Iterable of (n, 2) or (n, 3) vertex blocks.
+    - faces: Optional (m, 3) array of zero-based triangle vertex indices.
+    - line_chunks: Optional iterable of (k, 2) zero-based vertex index blocks.
+    """
+    with open(path, "wb") as f:
+        f.write(b"# generated by generate_fractals\n")
+        for block in vertex_chunks:
+            f.write(_obj_rows("v", _xyz(block), "%.7g"))
+        if faces is not None:
+            f.write(_obj_rows("f", np.asarray(faces) + 1, "%d"))
+        if line_chunks is not None:
+            for block in line_chunks:
+                f.write(_obj_rows("l", np.asarray(block) + 1, "%d"))
+
+
+def write_raw(path, chunks):
+    """
+    Writes blocks as raw little-endian float32 rows.
+    """
+    with open(path, "wb") as f:
+        for block in chunks:
+            np.ascontiguousarray(block, dtype='<f4').tofile(f)
+
+
+def _write_points(path, format, chunks, count):
+    if format == "ply":
+        write_ply(path, chunks, count)
+    elif format == "obj":
+        write_obj(path, chunks)
+    else:
+        write_raw(path, chunks)
+
+
+@timed("export.fern", lambda fern: {"vertices": fern.points})
+def export_fern(fern, path, format=None, chunk_size=1 << 16):
+    """
+    Exports the fern's points (numpy engine, streamed from iter_chunks) as a point cloud.
+    """
+    _write_points(path, _format(path, format), fern.iter_chunks(chunk_size), fern.points)
+
+
+@timed("export.seashell", lambda shell: {
+    "vertices": len(shell.vertices) if shell.mode == "mesh" else 2 * shell.points * shell.ring_samples})
+def export_seashell(shell, path, format=None, chunk_size=1 << 16):
+    """
+    Exports the seashell: its triangle mesh in mesh mode, otherwise its point cloud
+    streamed from iter_chunks. The mesh is generated if needed.
+    """
+    format = _format(path, format)
+    if shell.mode != "mesh":
+        count = 2 * shell.points * shell.ring_samples
+        _write_points(path, format, shell.iter_chunks(chunk_size), count)
+        return
+
+    if not hasattr(shell, "vertices"):
+        shell.generate_mesh()
+    vertex_chunks = (shell.vertices[i:i + chunk_size] for i in range(0, len(shell.vertices), chunk_size))
+    if format == "ply":
+        write_ply(path, vertex_chunks, len(shell.vertices), faces=shell.triangles)
+    elif format == "obj":
+        write_obj(path, vertex_chunks, faces=shell.triangles)
+    else:
+        write_raw(path, vertex_chunks)
+
+
+def _edge_chunks(count, chunk_size):
+    """
+    Yields the (2k, 2k + 1) vertex index pairs of `count` segments stored as consecutive
+    vertex pairs.
+    """
+    for lo in range(0, count, chunk_size):
+        hi = min(lo + chunk_size, count)
+        yield np.arange(2 * lo, 2 * hi, dtype='<i4').reshape(-1, 2)
+
+
+@timed("export.tree", lambda tree: {"branches": tree.branch_count(tree.depth)})
+def export_tree(tree, path, format=None, chunk_size=1 << 16):
+    """
+    Exports the tree's branches, streamed from iter_chunks, as segments: two vertices per
+    branch joined by a PLY edge or an OBJ line.
+    """
+    format = _format(path, format)
+    count = tree.branch_count(tree.depth)
+    vertex_chunks = (block.reshape(-1, 3) for block in tree.iter_chunks(chunk_size))
+    if format == "ply":
+        write_ply(path, vertex_chunks, 2 * count, edge_chunks=_edge_chunks(count, chunk_size), edge_count=count)
+    elif format == "obj":
+        write_obj(path, vertex_chunks, line_chunks=_edge_chunks(count, chunk_size))
+    else:
+        write_raw(path, vertex_chunks)
@@ -34,96 +34,202 @@
 # probabilities. The result is a detailed pattern that closely resembles a fern.
 ## =====================
 
-import matplotlib.pyplot as plt
-import random
+import numpy as np
+from ifs import IFS, PRESETS, iteration_count
+from instrument import timed
 
-class FractalFern:
-    def __init__(self, points=5000):
+# The four fern maps as coefficient arrays, in the layout used by IFS: row i holds
+# [[a, b, e], [c, d, f]] for f_i(x, y) = (a*x + b*y + e, c*x + d*y + f).
+FERN_COEFFICIENTS = PRESETS["fern"]
+FERN_PROBABILITIES = np.array([0.85, 0.07, 0.07, 0.01])
+
+# Bounding box (xmin, xmax, ymin, ymax) of the fern attractor, padded slightly.
+FERN_EXTENT = (-2.2, 2.7, 0.0, 10.0)
+
+ENGINES = ("python", "numpy")
+MODES = ("points", "density")
+
+
+class FractalFern(IFS):
+    def __init__(self, points=5000, engine="python", walkers=4096, burn_in=20, seed=None,
+                 mode="points", bins=(600, 900), extent=FERN_EXTENT, chunk_size=1 << 20, workers=1,
+                 probabilities=FERN_PROBABILITIES, tolerance=None, max_points=1 << 30):
+        """
+        Initializes the FractalFern object, a preset of the generic IFS with the
+        four Barnsley fern maps.
+
+        Parameters:
+        - points: Number of points to generate (at least 5000).
+        - engine: "python" for the reference list-based loop, or "numpy" for the
+          vectorized many-walker engine returning float64 arrays.
+        - walkers: Number of independent walkers used by the numpy engine.
+        - burn_in: Steps each walker takes before its points are recorded (numpy engine).
+        - seed: Optional seed for the numpy engine. Each task of the engine draws from
+          an independent child stream of this seed.
+        - mode: "points" to keep every generated point, or "density" to bin points
+          into a (height, width) count grid chunk by chunk (numpy engine only).
+        - bins: (width, height) of the density grid.
+        - extent: (xmin, xmax, ymin, ymax) covered by the density grid.
+        - chunk_size: Approximate number of points generated per chunk in density mode.
+        - workers: Number of processes used by the numpy engine. The output for a
+          given seed is identical for any number of workers.
+        - probabilities: Selection probabilities of the four maps. None selects
+          area-proportional probabilities (see IFS.area_probabilities).
+        - tolerance: Optional, density mode only. Instead of `points` points, generate
+          until the normalized density image changes by at most this much (see
+          IFS.generate_converged_density), so the number of points follows the grid's
+          resolution. The points used are stored in self.points_used.
+        - max_points: Upper bound on the number of points when a tolerance is given.
+        """
         # Check for negative points and raise ValueError
         if points < 0:
             raise ValueError("Number of points must be non-negative")
+        if engine not in ENGINES:
+            raise ValueError(f"Engine must be one of {ENGINES}")
+        if not isinstance(walkers, int) or walkers <= 0:
+            raise ValueError("Number of walkers must be a positive integer")
+        if not isinstance(burn_in, int) or burn_in < 0:
+            raise ValueError("Burn-in must be a non-negative integer")
+        if mode not in MODES:
+            raise ValueError(f"Mode must be one of {MODES}")
+        if mode == "density" and engine != "numpy":
+            raise ValueError("Density mode requires the numpy engine")
+        if len(bins) != 2 or not all(isinstance(n, int) and n > 0 for n in bins):
+            raise ValueError("Bins must be a pair of positive integers")
+        if extent[1] <= extent[0] or extent[3] <= extent[2]:
+            raise ValueError("Extent must be (xmin, xmax, ymin, ymax) with xmin < xmax and ymin < ymax")
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError("Chunk size must be a positive integer")
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError("Number of workers must be a positive integer")
+        if workers > 1 and engine != "numpy":
+            raise ValueError("Multiple workers require the numpy engine")
+        if tolerance is not None and (mode != "density" or tolerance < 0):
+            raise ValueError("Tolerance must be non-negative and requires density mode")
+        if tolerance is not None and workers > 1:
+            raise ValueError("A tolerance cannot be combined with multiple workers")
         
+        super().__init__(FERN_COEFFICIENTS, probabilities)
+
         # Initialize with a default of 5000 points if not specified
         self.points = max(points, 5000)  
+        self.engine = engine
+        self.walkers = walkers
+        self.burn_in = burn_in
+        self.seed = seed
+        self.mode = mode
+        self.bins = tuple(bins)
+        self.extent = tuple(extent)
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.tolerance = tolerance
+        self.max_points = max_points
+        self.points_used = self.points
     
-    def generate_points(self):
+    @timed("fern.generate", lambda self: {"points": self.points_used, "iterations": self._iterations()})
+    def generate_points(self, cache=None):
         """
         Generates the fractal points for the Barnsley Fern.
 
+        Parameters:
+        - cache: Optional GeometryCache. Seeded numpy-engine results are loaded from it
+          when present and stored in it otherwise.
+
         Returns:
-        - A tuple of two lists containing x and y coordinates of the fractal points.
+        - A tuple of x and y coordinates of the fractal points: lists for the
+          "python" engine, float64 arrays for the "numpy" engine. In density mode
+          the (height, width) count grid is returned instead and stored in self.density.
         """
-        print("Generating the fractal fern...")
-        x, y = 0.0, 0.0
-        x_list, y_list = [], []
-
-        # Define the set of transformations for generating the fractal pattern. Each transformation
-        # is a function that takes coordinates (x, y) as input and outputs new coordinates.
-
-        # Transformation 1: Represents the largest part of the fern (the stem and the larger leaves).
-        # This transformation is applied with an 85% probability, making it the most common transformation,
-        # which contributes to the bulk of the fern's structure.
-
-        # Transformation 2: Simulates the smaller leaflets on the left side of the fern.
-        # This transformation has a 7% chance of being applied, creating variety in the leaf shapes
-        # and positions by pushing the points to the left and slightly up.
-
-        # Transformation 3: Another variation of leaf or offshoot formation, similar probability to Transformation 2.
-        # It also applies scaling and rotation but with different parameters, contributing to the fractal's diversity.
-    
-        # Transformation 4: Represents the smallest probability, contributing to the finer details of the fractal.
-        # This transformation primarily affects the y-coordinate, simulating upward growth with minimal horizontal deviation.
-
-        transformations = [
-
-            (lambda x, y: (0.85 * x + 0.04 * y, -0.04 * x + 0.85 * y + 1.6), 0.85),
-            (lambda x, y: (-0.15 * x + 0.28 * y, 0.26 * x + 0.24 * y + 0.44), 0.07),
-            (lambda x, y: (0.2 * x - 0.26 * y, 0.23 * x + 0.22 * y + 1.6), 0.07),
-            (lambda x, y: (0.0, 0.16 * y), 0.01)
-        ]
-
-        # Iterate over the number of points to generate for the fractal pattern.
-        # `self.points` specifies how many iterations (and thus points) to create.
-        for _ in range(self.points):  # Use self.points to access the object's points attribute
-
-            # Randomly select one of the transformation functions based on their associated probabilities.
-            # `transformations` is a list of tuples, where each tuple contains a transformation function and its probability.
-            # `random.choices` returns a list of one selected function based on the specified weights (probabilities).
-            # `[0]` extracts the first (and only) element of this list, which is the tuple containing the function and its probability.
-            func, prob = random.choices(transformations, weights=[t[1] for t in transformations])[0]
- 
-            # Apply the selected transformation function to the current point (x, y).
-            # This updates the point's coordinates according to the fractal's generation rules.
-            x, y = func(x, y)
-
-            x_list.append(x)
-            y_list.append(y)
+        if cache is not None and cache.restore(self):
+            return self._result()
+
+        if self.tolerance is not None:
+            self.density, self.points_used, _ = self.generate_converged_density(
+                self.bins, self.extent, self.tolerance, max_points=self.max_points, walkers=self.walkers,
+                burn_in=self.burn_in, seed=self.seed)
+        elif self.engine == "numpy":
+            if self.mode == "density":
+                self.density = self.generate_density(self.points, self.bins, self.extent, self.walkers,
+                                                     self.burn_in, self.seed, self.workers, self.chunk_size)
+            else:
+                self.x_points, self.y_points = self.generate(self.points, self.walkers, self.burn_in,
+                                                             self.seed, self.workers)
+        else:
+            self.x_points, self.y_points = self.generate_reference(self.points)
+
+        if cache is not None:
+            cache.save(self)
+        return self._result()
+
+    def iter_chunks(self, chunk_size=1 << 16):
+        """
+        Generates the fern's points with the numpy engine in fixed-size blocks, holding
+        about one block in memory at a time. Concatenating the blocks gives the points of
+        generate_points() with the numpy engine and the same seed.
 
-        self.x_points, self.y_points = x_list, y_list  # Store the generated points in instance variables
+        Yields:
+        - float64 arrays of shape (chunk_size, 2) holding x and y; the last may be shorter.
+        """
+        return self.iter_point_chunks(self.points, chunk_size, self.walkers, self.burn_in, self.seed)
 
-    def plot(self, ax=None, scale_factor=.01):
+    def _iterations(self):
+        """
+        Number of map applications made by generate_points(), including burn-in.
+        """
+        if self.tolerance is not None:
+            return self.points_used + max(1, min(self.walkers, self.max_points)) * self.burn_in
+        if self.engine == "numpy":
+            return iteration_count(self.points, self.walkers, self.burn_in)
+        return self.points
+
+    def _result(self):
+        if self.mode == "density":
+            return self.density
+        return self.x_points, self.y_points
+
+    def _cache_params(self):
+        """
+        Parameters that determine the generated geometry, or None when it is not
+        reproducible (reference engine or unseeded generator).
+        """
+        if self.engine != "numpy" or self.seed is None:
+            return None
+        params = {"coefficients": self.coefficients, "probabilities": self.probabilities, "points": self.points,
+                  "walkers": self.walkers, "burn_in": self.burn_in, "seed": self.seed, "mode": self.mode}
+        if self.mode == "density":
+            params.update(bins=self.bins, extent=self.extent)
+        if self.tolerance is not None:
+            params.update(points=None, tolerance=self.tolerance, max_points=self.max_points)
+        return params
+
+    def _geometry(self):
+        if self.tolerance is not None:
+            return {"density": self.density, "points_used": np.array(self.points_used)}
+        if self.mode == "density":
+            return {"density": self.density}
+        return {"x_points": self.x_points, "y_points": self.y_points}
+
+    def _set_geometry(self, arrays):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        if "points_used" in arrays:
+            self.points_used = int(arrays["points_used"])
+
+    @timed("fern.plot", lambda self: {"points": self.points})
+    def plot(self, ax=None, scale_factor=.01, gamma=2.2, cmap='Greens', max_per_pixel=None):
         """
         Plots the generated points of the Fern using matplotlib on the provided axes.
 
         Parameters:
         - ax: Optional. A matplotlib axes object where the fern will be plotted.
              If None, a new figure and axes will be created.
+        - scale_factor: Factor applied to the fern's coordinates.
+        - gamma: Gamma applied after log tone mapping of the density grid (density mode).
+        - cmap: Colormap used to draw the density grid (density mode).
+        - max_per_pixel: Optional. Only this many points are drawn per pixel of the figure
+          (points mode), so drawing time depends on the figure's size and DPI rather than
+          on the number of points.
         """
-        print("Plotting the fractal fern...")
-        if ax is None:
-            fig, ax = plt.subplots(figsize=(6, 9))
-        
-        # Assuming self.x_points and self.y_points are populated by generate_points()
-        scaled_x_points = [x * scale_factor for x in self.x_points]
-        scaled_y_points = [y * scale_factor for y in self.y_points]
-
-        ax.scatter(scaled_x_points, scaled_y_points, s=0.1, color='green')
-        #ax.scatter(self.x_points, self.y_points, s=0.1, color='green')
-        ax.set_title("Barnsley Fern")
-        ax.axis('off')  # Optionally turn off the axis if desired
-
-        # If ax was provided, plt.show() might be managed outside this method
-        if ax is None:
-            plt.show()
-        
-     
+        # matplotlib is imported on the first plot, so generating points never pays for it.
+        from rendering import plot_fern
+        plot_fern(self, ax, scale_factor, gamma, cmap, max_per_pixel)
@@ -13,13 +13,201 @@
 # Draws a 3D fractal tree using recursive algorithm.
 # =====================
 
+from collections.abc import Sequence
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from utils import rotation_matrix_from_vectors
+from instrument import progress, timed
+from utils import rechunk, reusable, rotation_matrix_from_vectors, rotation_matrices_from_vectors
+
+ENGINES = ("vectorized", "recursive", "instanced")
+
+
+class BranchView(Sequence):
+    """
+    Read-only list-like view of (start, end) pairs over the tree's branch arrays,
+    kept for code written against the original list of tuples.
+    """
+    def __init__(self, starts, ends):
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [(self.starts[i], self.ends[i]) for i in range(*index.indices(len(self)))]
+        return self.starts[index], self.ends[index]
+
+
+def _frame_levels(frames, starts, length, levels, scale_factor, children):
+    """
+    Expands branches breadth first by carrying each branch's orientation frame down the
+    tree: a child's frame is its parent's frame followed by the fixed rotation in
+    `children`, so every subtree is an exact rotated copy of every other.
+
+    Parameters:
+    - frames: Rotations of shape (n, 3, 3) whose third column is the branch direction.
+    - starts: Start points of the branches, shape (n, 3).
+    - length: Length of these branches.
+    - levels: Number of levels to generate.
+    - scale_factor: Length ratio between a branch and its children.
+    - children: The four child rotations relative to the parent frame, shape (4, 3, 3).
+
+    Returns:
+    - The starts, ends and relative levels of the generated branches in level order, and
+      the frames, starts and length of the level below the last one generated.
+    """
+    total = len(starts) * (4 ** levels - 1) // 3
+    all_starts, all_ends = np.empty((total, 3)), np.empty((total, 3))
+    all_levels = np.empty(total, dtype=np.intp)
+    offset = 0
+    for level in range(levels):
+        end = offset + len(starts)
+        all_starts[offset:end] = starts
+        np.add(starts, length * frames[:, :, 2], out=all_ends[offset:end])
+        all_levels[offset:end] = level
+        frames = np.einsum('nij,kjl->nkil', frames, children).reshape(-1, 3, 3)
+        starts = np.repeat(all_ends[offset:end], 4, axis=0)
+        length *= scale_factor
+        offset = end
+    return all_starts, all_ends, all_levels, frames, starts, length
+
+
+class InstancedTree:
+    """
+    A fractal tree stored as one canonical subtree plus the (rotation, scale, offset)
+    of every copy of it.
+
+    The top `depth - subtree_depth` levels (the stem) are stored as explicit branches.
+    Every branch of the next level roots a copy of the canonical subtree, which is
+    generated once with its trunk at the origin pointing up with unit length. A tree of
+    depth 12 takes well under a megabyte this way instead of the ~300 MB of its 5.6
+    million explicit segments; segments are only produced by materialize() or
+    iter_chunks(), one batch of instances at a time.
+
+    Frames are carried down the tree (see _frame_levels), which is what makes subtrees
+    exact copies. The vectorized and recursive engines instead re-derive each frame as
+    the minimal rotation from the up direction, which twists the grandchildren of every
+    branch slightly about its axis, so from the third level on the two trees differ in
+    the azimuth of their branches (lengths and branch angles are the same).
+    """
+    def __init__(self, base, length, direction, depth, branch_angle, scale_factor, subtree_depth=None):
+        if subtree_depth is None:
+            subtree_depth = depth // 2
+        elif not 0 <= subtree_depth < max(depth, 1):
+            raise ValueError("Subtree depth must be between 0 and the tree depth minus 1")
+        self.depth = depth
+        self.subtree_depth = subtree_depth
+        self.scale_factor = scale_factor
+
+        sin, cos = np.sin(branch_angle), np.cos(branch_angle)
+        local = np.array([[sin, 0, cos], [-sin, 0, cos], [0, sin, cos], [0, -sin, cos]])
+        up = np.array([0, 0, 1])
+        self._children = rotation_matrices_from_vectors(up, local)
+
+        # The trunk spans length * direction as given, which need not be a unit vector,
+        # so it is always kept in the stem rather than as a scaled copy.
+        direction = np.asarray(direction, dtype=float).reshape(1, 3)
+        trunk_start = np.asarray(base, dtype=float).reshape(1, 3)
+        trunk_end = trunk_start + length * direction
+        if depth == 0:
+            trunk_start, trunk_end = np.empty((0, 3)), np.empty((0, 3))
+        frames = np.einsum('nij,kjl->nkil', rotation_matrices_from_vectors(up, direction), self._children)
+        starts, ends, levels, self.rotations, self.offsets, scale = _frame_levels(
+            frames.reshape(-1, 3, 3), np.repeat(trunk_end, 4, axis=0), length * scale_factor,
+            max(depth - 1 - subtree_depth, 0), scale_factor, self._children)
+        self.stem_starts = np.concatenate([trunk_start, starts])
+        self.stem_ends = np.concatenate([trunk_end, ends])
+        self.stem_levels = np.concatenate([np.zeros(len(trunk_start), dtype=np.intp), levels + 1])
+        self.scales = np.full(len(self.offsets), float(scale))
+        if depth == 0:
+            self.rotations, self.offsets, self.scales = np.empty((0, 3, 3)), np.empty((0, 3)), np.empty(0)
+
+        (self.subtree_starts, self.subtree_ends, self.subtree_levels,
+         self._leaf_frames, self._leaf_starts, self._leaf_length) = _frame_levels(
+            np.eye(3)[None], np.zeros((1, 3)), 1.0, self.subtree_depth, scale_factor, self._children)
+
+    def branch_count(self):
+        """
+        Returns the number of branches the instances stand for.
+        """
+        return len(self.stem_starts) + len(self.offsets) * len(self.subtree_starts)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the instanced representation, excluding the bookkeeping needed by deepen().
+        """
+        arrays = (self.stem_starts, self.stem_ends, self.stem_levels, self.rotations, self.scales, self.offsets,
+                  self.subtree_starts, self.subtree_ends, self.subtree_levels)
+        return sum(array.nbytes for array in arrays)
+
+    def deepen(self, levels=1):
+        """
+        Adds `levels` levels to the tree by growing only the canonical subtree, which
+        costs 4**subtree_depth new branches per level rather than a regeneration of the
+        whole tree.
+        """
+        if levels < 0:
+            raise ValueError("Levels cannot be negative")
+        if levels and self.depth == 0:
+            raise ValueError("A tree of depth 0 has no subtree to deepen")
+        if levels == 0:
+            return
+        starts, ends, relative, self._leaf_frames, self._leaf_starts, self._leaf_length = _frame_levels(
+            self._leaf_frames, self._leaf_starts, self._leaf_length, levels, self.scale_factor, self._children)
+        self.subtree_starts = np.concatenate([self.subtree_starts, starts])
+        self.subtree_ends = np.concatenate([self.subtree_ends, ends])
+        self.subtree_levels = np.concatenate([self.subtree_levels, relative + self.subtree_depth])
+        self.subtree_depth += levels
+        self.depth += levels
+
+    def _instance_rows(self, lo, hi):
+        """
+        Returns the start and end points, shape (n, 6), and levels of the branches of
+        instances lo to hi, instance by instance.
+        """
+        rotations, scales, offsets = self.rotations[lo:hi], self.scales[lo:hi, None, None], self.offsets[lo:hi, None]
+        rows = np.empty((hi - lo, len(self.subtree_starts), 6))
+        rows[..., :3] = offsets + scales * np.einsum('nij,mj->nmi', rotations, self.subtree_starts)
+        rows[..., 3:] = offsets + scales * np.einsum('nij,mj->nmi', rotations, self.subtree_ends)
+        levels = np.tile(self.subtree_levels + (self.depth - self.subtree_depth), hi - lo)
+        return rows.reshape(-1, 6), levels
+
+    def materialize(self):
+        """
+        Returns the starts, ends and levels of every branch: the stem in level order,
+        followed by each instance's copy of the canonical subtree.
+        """
+        rows, levels = self._instance_rows(0, len(self.offsets))
+        starts = np.concatenate([self.stem_starts, rows[:, :3]])
+        ends = np.concatenate([self.stem_ends, rows[:, 3:]])
+        return starts, ends, np.concatenate([self.stem_levels, levels])
+
+    def iter_chunks(self, chunk_size=1 << 16):
+        """
+        Generates the branches in fixed-size blocks, in the order of materialize(),
+        transforming as many whole instances at a time as fit in a chunk.
+
+        Yields:
+        - float64 arrays of shape (chunk_size, 6) holding the start and end point of each
+          branch; the last may be shorter.
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        per_batch = max(1, chunk_size // max(1, len(self.subtree_starts)))
+
+        def blocks():
+            if len(self.stem_starts):
+                yield np.concatenate([self.stem_starts, self.stem_ends], axis=1)
+            for lo in range(0, len(self.offsets), per_batch):
+                yield self._instance_rows(lo, min(lo + per_batch, len(self.offsets)))[0]
+
+        return rechunk(blocks(), chunk_size)
+
 
 class FractalTree3D:
-    def __init__(self, base, length, direction, depth, branch_angle, scale_factor):
+    def __init__(self, base, length, direction, depth, branch_angle, scale_factor, engine="vectorized"):
 
                # Type checking
         if not isinstance(base, np.ndarray) or not isinstance(direction, np.ndarray):
@@ -38,6 +226,8 @@ class FractalTree3D:
             raise ValueError("Depth cannot be negative")
         if not (0 <= branch_angle <= 2 * np.pi):
             raise ValueError("Branch angle must be between 0 and 2π radians")
+        if engine not in ENGINES:
+            raise ValueError(f"Engine must be one of {ENGINES}")
 
         self.base = base
         self.length = length
@@ -45,21 +235,182 @@ class FractalTree3D:
         self.depth = depth
         self.branch_angle = branch_angle
         self.scale_factor = scale_factor
-        self.branches = []  # List to store branch information
+        self.engine = engine
+
+        # Branch information: start and end points, shape (N, 3), and the level of
+        # each branch (0 for the trunk), shape (N,).
+        self.starts = np.empty((0, 3))
+        self.ends = np.empty((0, 3))
+        self.levels = np.empty(0, dtype=np.intp)
+
+    @property
+    def branches(self):
+        """
+        The branches as a sequence of (start, end) pairs, viewing self.starts and self.ends.
+        """
+        return BranchView(self.starts, self.ends)
+
+    @staticmethod
+    def branch_count(depth):
+        """
+        Returns the number of branches of a tree of the given depth, 1 + 4 + ... + 4**(depth - 1).
+        """
+        return (4 ** depth - 1) // 3
+
+    @timed("tree.generate", lambda self: {"branches": len(self.starts)})
+    def generate_points(self, cache=None, reuse=False):
+        """
+        Generates the fractal tree structure and stores it in self.starts, self.ends
+        and self.levels.
+
+        Parameters:
+        - cache: Optional GeometryCache. The branches are loaded from it when present and
+          stored in it otherwise, so re-plotting with other colours or view angles skips
+          generation.
+        - reuse: Fill the branch arrays of the previous call in place when the depth is
+          unchanged, instead of allocating new ones (vectorized engine). Arrays obtained
+          from the previous call then hold the new branches too.
+        """
+        if cache is not None and cache.restore(self):
+            return
+        self._generate(reuse)
+        if cache is not None:
+            cache.save(self)
+
+    def _cache_params(self):
+        """
+        Parameters that determine the generated geometry.
+        """
+        return {"base": self.base, "length": self.length, "direction": self.direction, "depth": self.depth,
+                "branch_angle": self.branch_angle, "scale_factor": self.scale_factor, "engine": self.engine}
+
+    def _geometry(self):
+        return {"starts": self.starts, "ends": self.ends, "levels": self.levels}
+
+    def _set_geometry(self, arrays):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def instanced(self, subtree_depth=None):
+        """
+        Returns the tree as an InstancedTree: a canonical subtree of depth
+        `subtree_depth` (by default half the depth, rounded up) and one rotation, scale
+        and offset per copy of it. This is the geometry of the "instanced" engine.
+        """
+        return InstancedTree(self.base, self.length, self.direction, self.depth, self.branch_angle,
+                             self.scale_factor, subtree_depth)
 
-    def generate_points(self):
+    def _generate(self, reuse=False):
+        if self.engine == "instanced":
+            self.starts, self.ends, self.levels = self.instanced().materialize()
+            return
+        if self.engine == "recursive":
+            self._recursive_branches = []
+            self._generate_recursive(self.base, self.length, self.direction, self.depth)
+            if self._recursive_branches:
+                starts, ends, levels = zip(*self._recursive_branches)
+                self.starts, self.ends = np.array(starts, dtype=float), np.array(ends, dtype=float)
+                self.levels = np.array(levels, dtype=np.intp)
+            del self._recursive_branches
+            return
+        self._generate_levels(reuse)
+
+    def _local_directions(self):
+        """
+        Returns the four child directions relative to the up direction (0, 0, 1):
+        two opposite bifurcations in the x-z plane and two in the y-z plane.
+        """
+        sin, cos = np.sin(self.branch_angle), np.cos(self.branch_angle)
+        return np.array([[sin, 0, cos], [-sin, 0, cos], [0, sin, cos], [0, -sin, cos]])
+
+    def _generate_levels(self, reuse=False):
         """
-        Generates the fractal tree structure and stores each branch in self.branches.
+        Generates the tree breadth-first, processing each level as one batch and writing
+        the branches into arrays preallocated from the geometric series 1 + 4 + 16 + ...
+        Within a level, branches are ordered by parent and then by child direction, the
+        same order in which the recursive engine visits them.
         """
-        print("Generating the fractal tree...")
-        self._generate_recursive(self.base, self.length, self.direction, self.depth)
+        total = self.branch_count(self.depth)
+        if reuse:
+            self.starts, self.ends = reusable(self.starts, (total, 3)), reusable(self.ends, (total, 3))
+            self.levels = reusable(self.levels, (total,), np.intp)
+        else:
+            self.starts, self.ends = np.empty((total, 3)), np.empty((total, 3))
+            self.levels = np.empty(total, dtype=np.intp)
+        if total == 0:
+            return
+
+        up = np.array([0, 0, 1])
+        local = self._local_directions()
+        starts = np.asarray(self.base, dtype=float).reshape(1, 3)
+        directions = np.asarray(self.direction, dtype=float).reshape(1, 3)
+        length = self.length
+        offset = 0
+        for level in range(self.depth):
+            count = len(starts)
+            end = offset + count
+            self.starts[offset:end] = starts
+            np.add(starts, length * directions, out=self.ends[offset:end])
+            self.levels[offset:end] = level
+            progress("tree.generate", end, total)
+            if level + 1 < self.depth:
+                # Rotate the four local directions into the frame of every branch of this
+                # level at once; each parent contributes four consecutive children.
+                rotations = rotation_matrices_from_vectors(up, directions)
+                directions = np.einsum('nij,kj->nki', rotations, local).reshape(-1, 3)
+                starts = np.repeat(self.ends[offset:end], 4, axis=0)
+                length *= self.scale_factor
+            offset = end
+
+    def iter_chunks(self, chunk_size=1 << 16):
+        """
+        Generates the branches in fixed-size blocks without building the whole tree.
+
+        Branches are expanded depth first in batches of at most chunk_size parents, so
+        memory stays at a few chunks per level however deep the tree is. Blocks therefore
+        come in depth-first batch order rather than the level order of generate_points().
+        With the instanced engine, the blocks are those of InstancedTree.iter_chunks().
+
+        Yields:
+        - float64 arrays of shape (chunk_size, 6) holding the start and end point of each
+          branch; the last may be shorter.
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        if self.engine == "instanced":
+            return self.instanced().iter_chunks(chunk_size)
+        up = np.array([0, 0, 1])
+        local = self._local_directions()
+
+        def blocks():
+            if self.depth == 0:
+                return
+            stack = [(np.asarray(self.base, dtype=float).reshape(1, 3),
+                      np.asarray(self.direction, dtype=float).reshape(1, 3), self.length, 0)]
+            while stack:
+                starts, directions, length, level = stack.pop()
+                ends = starts + length * directions
+                yield np.concatenate([starts, ends], axis=1)
+                if level + 1 < self.depth:
+                    rotations = rotation_matrices_from_vectors(up, directions)
+                    children = np.einsum('nij,kj->nki', rotations, local).reshape(-1, 3)
+                    child_starts = np.repeat(ends, 4, axis=0)
+                    # Push in reverse so the first batch of children is expanded first.
+                    for lo in reversed(range(0, len(children), chunk_size)):
+                        stack.append((child_starts[lo:lo + chunk_size], children[lo:lo + chunk_size],
+                                      length * self.scale_factor, level + 1))
+
+        return rechunk(blocks(), chunk_size)
 
     def _generate_recursive(self, base, length, direction, depth):
+        """
+        Reference engine: generates one branch per call, depth first.
+        """
         if depth == 0:
             return
 
         end = base + length * direction
-        self.branches.append((base, end))  # Store the branch's start and end points
+        self._recursive_branches.append((base, end, self.depth - depth))  # Store the branch's start and end points
 
         # Calculate the rotation matrix to align the new branches with the current branch's direction.
         # This matrix rotates the standard up direction (0, 0, 1) to the current branch's direction vector.
@@ -89,23 +440,29 @@ class FractalTree3D:
         for new_direction in new_directions:
             self._generate_recursive(end, length * self.scale_factor, new_direction, depth - 1)
 
-    def plot(self, ax=None, set_limits=True, view_init_elev=10, view_init_azim=60):
+    @timed("tree.plot", lambda self: {"branches": len(self.starts)})
+    def plot(self, ax=None, set_limits=True, view_init_elev=10, view_init_azim=60,
+             color='saddlebrown', tip_color='olivedrab', twig_length=None, twig_size=1, lod_threshold=None):
         """
         Draws the generated fractal tree structure on a matplotlib 3D axis.
-        """
-        print("Plotting the fractal tree...")
-        if ax is None:
-            fig = plt.figure(figsize=(10, 10))
-            ax = fig.add_subplot(111, projection='3d')
-
-        for base, end in self.branches:
-            ax.plot([base[0], end[0]], [base[1], end[1]], [base[2], end[2]], color='brown', lw=self.depth)
 
-        # if set_limits:
-        #     ax.set_xlim([-1, 1])
-        #     ax.set_ylim([-1, 1])
-        #     ax.set_zlim([0, 2])
-
-        ax.view_init(elev=view_init_elev, azim=view_init_azim)
-        plt.axis('off')  
+        All branches are drawn through a single Line3DCollection. Line width decreases
+        from self.depth at the trunk to 1 at the outermost level, and the colour blends
+        from `color` at the trunk to `tip_color` at the outermost level.
 
+        Parameters:
+        - ax: Optional. A matplotlib 3D axes object. If None, a new figure and 3D axes are created.
+        - set_limits: Fit the axis limits to the tree.
+        - view_init_elev, view_init_azim: Elevation and azimuth of the view.
+        - color, tip_color: Colours of the trunk and of the outermost branches.
+        - twig_length: Optional. Branches shorter than this are collapsed into a point
+          cloud of their end points instead of being drawn as segments.
+        - twig_size: Marker size of the collapsed twigs.
+        - lod_threshold: Optional. Subtrees whose projection onto the figure, at its size,
+          DPI and the given view, spans fewer pixels than this are not drawn; see
+          lod.tree_lod_depth().
+        """
+        # Imported lazily: matplotlib is only loaded once something is drawn.
+        from rendering import plot_tree
+        plot_tree(self, ax, set_limits, view_init_elev, view_init_azim, color, tip_color, twig_length, twig_size,
+                  lod_threshold)
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# ifs.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+## =====================
+# Iterated Function Systems
+# An iterated function system (IFS) is a finite set of contractive affine maps
+# f_i(x, y) = (a*x + b*y + e, c*x + d*y + f), each chosen with probability p_i.
+# Repeatedly applying randomly chosen maps to a point (the "chaos game") makes it
+# visit the attractor of the system, e.g. the Barnsley fern or the Sierpinski triangle.
+#
+# The IFS class below takes the maps as an (n, 2, 3) coefficient array, where row i
+# holds [[a, b, e], [c, d, f]], together with a probability vector, and evaluates them
+# with a batched many-walker NumPy engine.
+## =====================
+
+import numpy as np
+import random
+from instrument import progress
+from utils import rechunk
+
+# Number of steps whose transform indices are drawn in one bulk call.
+_INDEX_BLOCK = 256
+
+# Number of points generated by one task of the numpy engine. Work is always split
+# into tasks of this size, each with its own child seed, so the output for a given
+# seed does not depend on how many workers run the tasks.
+_TASK_POINTS = 1 << 21
+
+
+def _iter_chaos_game(coefficients, probabilities, points, walkers, burn_in, rng, chunk_steps=_INDEX_BLOCK):
+    """
+    Runs the chaos game with many independent walkers advanced in lock-step,
+    yielding the visited points chunk by chunk.
+
+    Parameters:
+    - coefficients: (n, 2, 3) array of affine maps.
+    - probabilities: (n,) array of selection probabilities.
+    - points: Total number of points to yield.
+    - walkers: Number of walkers advanced at once.
+    - burn_in: Steps each walker takes before its points are recorded.
+    - rng: A numpy Generator.
+    - chunk_steps: Number of walker steps per yielded chunk.
+
+    Yields:
+    - Tuples of two float64 arrays with the x and y coordinates of each chunk.
+    """
+    walkers = max(1, min(walkers, points))
+    cumulative = np.cumsum(probabilities)
+    cumulative /= cumulative[-1]
+    last = len(cumulative) - 1
+    a, b, e = coefficients[:, 0, 0], coefficients[:, 0, 1], coefficients[:, 0, 2]
+    c, d, f = coefficients[:, 1, 0], coefficients[:, 1, 1], coefficients[:, 1, 2]
+
+    def draw(steps):
+        indices = np.searchsorted(cumulative, rng.random((steps, walkers)), side='right')
+        return np.minimum(indices, last, out=indices)
+
+    x = np.zeros(walkers)
+    y = np.zeros(walkers)
+    for block_start in range(0, burn_in, _INDEX_BLOCK):
+        for idx in draw(min(_INDEX_BLOCK, burn_in - block_start)):
+            x, y = a[idx] * x + b[idx] * y + e[idx], c[idx] * x + d[idx] * y + f[idx]
+
+    remaining = points
+    while remaining > 0:
+        steps = min(chunk_steps, -(-remaining // walkers))
+        x_out = np.empty((steps, walkers))
+        y_out = np.empty((steps, walkers))
+        for row, idx in enumerate(draw(steps)):
+            x, y = a[idx] * x + b[idx] * y + e[idx], c[idx] * x + d[idx] * y + f[idx]
+            x_out[row] = x
+            y_out[row] = y
+        count = min(remaining, steps * walkers)
+        yield x_out.ravel()[:count], y_out.ravel()[:count]
+        remaining -= count
+
+
+def _accumulate_density(chunks, bins, extent):
+    """
+    Bins streamed points into a fixed-size 2D count grid.
+
+    Parameters:
+    - chunks: Iterable of (x, y) array pairs.
+    - bins: (width, height) of the grid in cells.
+    - extent: (xmin, xmax, ymin, ymax) covered by the grid.
+
+    Returns:
+    - An int64 array of shape (height, width); row 0 corresponds to ymin.
+    """
+    width, height = bins
+    xmin, xmax, ymin, ymax = extent
+    x_scale = width / (xmax - xmin)
+    y_scale = height / (ymax - ymin)
+    counts = np.zeros(width * height, dtype=np.int64)
+    for x, y in chunks:
+        ix = np.floor((x - xmin) * x_scale).astype(np.intp)
+        iy = np.floor((y - ymin) * y_scale).astype(np.intp)
+        inside = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        counts += np.bincount(iy[inside] * width + ix[inside], minlength=width * height)
+    return counts.reshape(height, width)
+
+
+def _run_task(task):
+    """
+    Runs one chaos-game task on its own generator stream.
+
+    Parameters:
+    - task: Tuple of (coefficients, probabilities, points, walkers, burn_in,
+      seed_sequence, chunk_steps, bins, extent). When bins is None the task's
+      points are returned as an (x, y) pair, otherwise a partial density grid.
+    """
+    coefficients, probabilities, points, walkers, burn_in, seed_sequence, chunk_steps, bins, extent = task
+    rng = np.random.default_rng(seed_sequence)
+    chunks = _iter_chaos_game(coefficients, probabilities, points, walkers, burn_in, rng, chunk_steps)
+    if bins is not None:
+        return _accumulate_density(chunks, bins, extent)
+    return _merge_results(chunks, points, None)
+
+
+def _make_tasks(coefficients, probabilities, points, walkers, burn_in, seed, chunk_steps, bins, extent):
+    """
+    Splits `points` into tasks of _TASK_POINTS points, each with its own child seed.
+    """
+    sizes = [_TASK_POINTS] * (points // _TASK_POINTS)
+    if points % _TASK_POINTS:
+        sizes.append(points % _TASK_POINTS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(coefficients, probabilities, size, walkers, burn_in, seed_sequence, chunk_steps, bins, extent)
+            for size, seed_sequence in zip(sizes, seeds)]
+
+
+def iteration_count(points, walkers, burn_in):
+    """
+    Returns the number of map applications made to generate `points` points, including
+    every task's burn-in.
+    """
+    sizes = [_TASK_POINTS] * (points // _TASK_POINTS) + ([points % _TASK_POINTS] if points % _TASK_POINTS else [])
+    return points + sum(max(1, min(walkers, size)) * burn_in for size in sizes)
+
+
+def _chaos_game(coefficients, probabilities, points, walkers, burn_in, seed,
+                workers=1, chunk_steps=_INDEX_BLOCK, bins=None, extent=None):
+    """
+    Runs the chaos game split into fixed-size tasks with independent child seeds,
+    optionally spread over a process pool, and merges the partial results in task order.
+
+    Returns:
+    - A tuple of two float64 arrays of length `points` when bins is None, otherwise
+      the merged (height, width) density grid.
+    """
+    tasks = _make_tasks(coefficients, probabilities, points, walkers, burn_in, seed, chunk_steps, bins, extent)
+    if workers > 1 and len(tasks) > 1:
+        # Imported here: the process machinery is slow to import and most runs use one worker.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = executor.map(_run_task, tasks)
+            return _merge_results(results, points, bins, len(tasks))
+    return _merge_results(map(_run_task, tasks), points, bins, len(tasks))
+
+
+def _merge_results(results, points, bins, tasks=None):
+    """
+    Merges per-task results (or per-chunk point pairs), consuming them one at a time in
+    order. When the number of tasks is given, progress is reported after each one.
+    """
+    if bins is not None:
+        width, height = bins
+        density = np.zeros((height, width), dtype=np.int64)
+        for done, partial in enumerate(results, start=1):
+            density += partial
+            if tasks:
+                progress("ifs.chaos_game", done, tasks)
+        return density
+
+    x_points = np.empty(points)
+    y_points = np.empty(points)
+    filled = 0
+    for done, (x, y) in enumerate(results, start=1):
+        x_points[filled:filled + len(x)] = x
+        y_points[filled:filled + len(y)] = y
+        filled += len(x)
+        if tasks:
+            progress("ifs.chaos_game", done, tasks)
+    return x_points, y_points
+
+
+class IFS:
+    def __init__(self, coefficients, probabilities=None):
+        """
+        Initializes the IFS object and compiles its maps for the batched engine.
+
+        Parameters:
+        - coefficients: (n, 2, 3) array-like of affine maps, row i being
+          [[a, b, e], [c, d, f]] for f_i(x, y) = (a*x + b*y + e, c*x + d*y + f).
+        - probabilities: Optional (n,) array-like of non-negative selection weights,
+          normalized to sum to 1. If None, area-proportional probabilities are used.
+        """
+        coefficients = np.array(coefficients, dtype=np.float64)
+        if coefficients.ndim != 3 or coefficients.shape[1:] != (2, 3) or len(coefficients) == 0:
+            raise ValueError("Coefficients must have shape (n, 2, 3) with n >= 1")
+        if not np.all(np.isfinite(coefficients)):
+            raise ValueError("Coefficients must be finite")
+
+        if probabilities is None:
+            probabilities = self.area_probabilities(coefficients)
+        probabilities = np.array(probabilities, dtype=np.float64)
+        if probabilities.shape != (len(coefficients),):
+            raise ValueError("Probabilities must have one entry per map")
+        if not np.all(np.isfinite(probabilities)) or np.any(probabilities < 0):
+            raise ValueError("Probabilities must be finite and non-negative")
+        if probabilities.sum() <= 0:
+            raise ValueError("Probabilities must not all be zero")
+
+        self.coefficients = coefficients
+        self.probabilities = probabilities / probabilities.sum()
+
+    @staticmethod
+    def area_probabilities(coefficients, floor=0.01):
+        """
+        Computes area-proportional probabilities, p_i ~ |det(A_i)|, which spread the
+        points evenly over the attractor so coverage converges faster.
+
+        Parameters:
+        - coefficients: (n, 2, 3) array of affine maps.
+        - floor: Minimum share given to each map, so that degenerate maps (such as
+          the fern's stem, whose determinant is zero) are still visited.
+
+        Returns:
+        - An (n,) array of probabilities summing to 1.
+        """
+        coefficients = np.asarray(coefficients, dtype=np.float64)
+        weights = np.abs(np.linalg.det(coefficients[:, :, :2]))
+        total = weights.sum()
+        if total == 0:
+            return np.full(len(coefficients), 1.0 / len(coefficients))
+        weights = np.maximum(weights / total, floor)
+        return weights / weights.sum()
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def iter_point_chunks(self, points, chunk_size=1 << 16, walkers=4096, burn_in=20, seed=None):
+        """
+        Generates points on the attractor in fixed-size blocks, holding at most about one
+        block in memory. Concatenating the blocks gives the output of generate() for the
+        same seed.
+
+        Yields:
+        - float64 arrays of shape (chunk_size, 2) holding x and y; the last may be shorter.
+        """
+        chunk_steps = max(1, chunk_size // walkers)
+        tasks = _make_tasks(self.coefficients, self.probabilities, points, walkers, burn_in, seed,
+                            chunk_steps, None, None)
+
+        def blocks():
+            for coefficients, probabilities, size, walkers_, burn_in_, seed_sequence, steps, _, _ in tasks:
+                rng = np.random.default_rng(seed_sequence)
+                for x, y in _iter_chaos_game(coefficients, probabilities, size, walkers_, burn_in_, rng, steps):
+                    yield np.stack([x, y], axis=1)
+
+        return rechunk(blocks(), chunk_size)
+
+    def generate(self, points, walkers=4096, burn_in=20, seed=None, workers=1):
+        """
+        Generates points on the attractor with the batched many-walker engine.
+
+        Parameters:
+        - points: Number of points to generate.
+        - walkers: Number of independent walkers advanced at once.
+        - burn_in: Steps each walker takes before its points are recorded.
+        - seed: Optional seed; each task draws from an independent child stream of it.
+        - workers: Number of processes. The output for a seed does not depend on it.
+
+        Returns:
+        - A tuple of two float64 arrays with the x and y coordinates.
+        """
+        return _chaos_game(self.coefficients, self.probabilities, points, walkers, burn_in, seed, workers)
+
+    def generate_density(self, points, bins, extent=None, walkers=4096, burn_in=20, seed=None,
+                         workers=1, chunk_size=1 << 20):
+        """
+        Bins points on the attractor into a fixed-size count grid as they are generated,
+        so memory depends on the grid size and not on the number of points.
+
+        Parameters:
+        - points: Number of points to generate.
+        - bins: (width, height) of the grid.
+        - extent: (xmin, xmax, ymin, ymax) covered by the grid; estimated if None.
+        - chunk_size: Approximate number of points generated per chunk.
+        - walkers, burn_in, seed, workers: As for generate().
+
+        Returns:
+        - An int64 array of shape (height, width); row 0 corresponds to ymin.
+        """
+        if extent is None:
+            extent = self.estimate_extent()
+        chunk_steps = max(1, chunk_size // walkers)
+        return _chaos_game(self.coefficients, self.probabilities, points, walkers, burn_in, seed,
+                           workers, chunk_steps, tuple(bins), tuple(extent))
+
+    def generate_converged_density(self, bins, extent=None, tolerance=0.01, coverage_tolerance=0.0,
+                                   max_points=1 << 30, walkers=4096, burn_in=20, seed=None, chunk_size=None):
+        """
+        Bins points into a count grid until the image stops changing, instead of for a
+        fixed number of points.
+
+        Chunks of chunk_size points are binned alternately into two halves of the grid.
+        After each pair of chunks the halves hold equal numbers of points, and half the
+        L1 distance between their normalized images is how much the latest half changed
+        the combined image. Generation stops once that change is at most `tolerance`,
+        or once a pair of chunks adds no more than `coverage_tolerance` times the
+        covered pixels as new ones, or after max_points points.
+
+        Parameters:
+        - bins: (width, height) of the grid.
+        - extent: (xmin, xmax, ymin, ymax) covered by the grid; estimated if None.
+        - tolerance: Largest acceptable change of the normalized image (0 to 2).
+        - coverage_tolerance: Share of newly covered pixels below which coverage counts
+          as converged; 0 waits for a pair of chunks that covers no new pixel.
+        - max_points: Upper bound on the number of points.
+        - walkers, burn_in, seed: As for generate(); the walkers run as one stream.
+        - chunk_size: Approximate number of points per chunk; a quarter of the number of
+          pixels if None, so that small previews are checked often and large grids are
+          not compared more often than they are filled.
+
+        Returns:
+        - The int64 grid of shape (height, width), row 0 corresponding to ymin, the
+          number of points binned, and the number of map applications including burn-in.
+        """
+        if extent is None:
+            extent = self.estimate_extent()
+        if tolerance < 0 or coverage_tolerance < 0:
+            raise ValueError("Tolerances cannot be negative")
+        width, height = bins
+        if chunk_size is None:
+            chunk_size = width * height // 4
+        halves = [np.zeros((height, width), dtype=np.int64), np.zeros((height, width), dtype=np.int64)]
+        rng = np.random.default_rng(seed)
+        chunks = _iter_chaos_game(self.coefficients, self.probabilities, max_points, walkers, burn_in, rng,
+                                  max(1, chunk_size // walkers))
+        points = covered = 0
+        for index, chunk in enumerate(chunks):
+            halves[index % 2] += _accumulate_density([chunk], (width, height), tuple(extent))
+            points += len(chunk[0])
+            progress("ifs.converge", points, max_points)
+            if index % 2 == 0:
+                continue
+            totals = halves[0].sum(), halves[1].sum()
+            if not all(totals):
+                continue
+            change = 0.5 * np.abs(halves[0] / totals[0] - halves[1] / totals[1]).sum()
+            now_covered = np.count_nonzero(halves[0] + halves[1])
+            new, covered = now_covered - covered, now_covered
+            if change <= tolerance or (index > 1 and new <= coverage_tolerance * covered):
+                break
+        iterations = points + max(1, min(walkers, max_points)) * burn_in
+        return halves[0] + halves[1], points, iterations
+
+    def address_cover(self, window, extent=None, leaf_fraction=0.25, max_leaves=1 << 14, max_depth=64):
+        """
+        Finds the compositions f_w = f_w1 o ... o f_wk of the maps whose images of the
+        attractor can reach `window`, refined until each is small next to the window.
+
+        Starting from the whole attractor, every piece f_w(A) whose bounding box meets
+        the window is split into its sub-pieces f_w(f_i(A)); pieces that miss it are
+        dropped. A piece is kept as a leaf once its box is at most `leaf_fraction` of
+        the window's size, so the leaves cover the window's part of the attractor with
+        little outside it, however small the window is.
+
+        Parameters:
+        - window: (xmin, xmax, ymin, ymax) of the region.
+        - extent: Bounding box of the attractor; estimated if None.
+        - leaf_fraction: Size of a leaf relative to the larger side of the window.
+        - max_leaves: Refinement stops early, keeping the pieces found so far, rather
+          than produce more leaves than this.
+        - max_depth: Maximum length of an address.
+
+        Returns:
+        - The composed maps, shape (m, 2, 3), and the weight of each, shape (m,): the
+          product of the probabilities along its address, i.e. the share of the
+          invariant measure the chaos game puts on f_w(A).
+        """
+        if extent is None:
+            extent = self.estimate_extent()
+        xmin, xmax, ymin, ymax = extent
+        center = np.array([(xmin + xmax) / 2, (ymin + ymax) / 2])
+        half = np.array([(xmax - xmin) / 2, (ymax - ymin) / 2])
+        low, high = np.array(window[0::2], dtype=float), np.array(window[1::2], dtype=float)
+        target = leaf_fraction * np.max(high - low)
+        live = self.probabilities > 0
+
+        maps = np.array([[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]])
+        weights = np.ones(1)
+        leaf_maps, leaf_weights = [], []
+        for depth in range(max_depth + 1):
+            centers = maps[:, :, :2] @ center + maps[:, :, 2]
+            halves = np.abs(maps[:, :, :2]) @ half
+            hit = np.all((centers - halves <= high) & (centers + halves >= low), axis=1)
+            maps, weights, halves = maps[hit], weights[hit], halves[hit]
+            small = 2 * halves.max(axis=1) <= target
+            leaf_maps.append(maps[small])
+            leaf_weights.append(weights[small])
+            maps, weights = maps[~small], weights[~small]
+            found = sum(len(leaf) for leaf in leaf_weights)
+            if not len(maps) or depth == max_depth or found + len(maps) * np.count_nonzero(live) > max_leaves:
+                break
+            # Compose every live piece with every map: f_w o f_i.
+            linear = maps[:, None, :, :2] @ self.coefficients[None, live, :, :2]
+            shift = maps[:, None, :, :2] @ self.coefficients[None, live, :, 2:] + maps[:, None, :, 2:]
+            maps = np.concatenate([linear, shift], axis=3).reshape(-1, 2, 3)
+            weights = (weights[:, None] * self.probabilities[live]).ravel()
+        leaf_maps.append(maps)
+        leaf_weights.append(weights)
+        return np.concatenate(leaf_maps), np.concatenate(leaf_weights)
+
+    def generate_region_density(self, window, points, bins, extent=None, walkers=4096, burn_in=20, seed=None,
+                                chunk_size=1 << 16, leaf_fraction=0.25, max_leaves=1 << 14):
+        """
+        Bins points of the attractor that fall in `window` into a count grid, spending
+        the sampling effort on the window rather than on the whole attractor.
+
+        Each point is a chaos-game point x mapped through one of the leaves f_w of
+        address_cover(), chosen with probability proportional to its weight. This
+        samples the invariant measure restricted to the leaves, so the grid has the
+        same shape as the corresponding part of generate_density()'s grid while the
+        cost per point stays the same at any zoom.
+
+        Parameters:
+        - window: (xmin, xmax, ymin, ymax) covered by the grid.
+        - points: Number of points to generate; those landing outside the window are dropped.
+        - bins: (width, height) of the grid.
+        - extent: Bounding box of the attractor; estimated if None.
+        - walkers, burn_in, seed, chunk_size: As for iter_point_chunks().
+        - leaf_fraction, max_leaves: As for address_cover().
+
+        Returns:
+        - An int64 array of shape (height, width), row 0 corresponding to ymin, and the
+          total weight of the leaves: counts * weight / points estimates the share of
+          the invariant measure in each cell.
+        """
+        maps, weights = self.address_cover(window, extent, leaf_fraction, max_leaves)
+        mass = float(weights.sum())
+        if mass == 0:
+            return np.zeros(tuple(bins)[::-1], dtype=np.int64), 0.0
+        cumulative = np.cumsum(weights) / mass
+        last = len(cumulative) - 1
+        point_seed, leaf_seed = np.random.SeedSequence(seed).generate_state(2)
+        rng = np.random.default_rng(leaf_seed)
+
+        def chunks():
+            for block in self.iter_point_chunks(points, chunk_size, walkers, burn_in, int(point_seed)):
+                leaf = np.minimum(np.searchsorted(cumulative, rng.random(len(block)), side='right'), last)
+                chosen = maps[leaf]
+                x, y = block[:, 0], block[:, 1]
+                yield (chosen[:, 0, 0] * x + chosen[:, 0, 1] * y + chosen[:, 0, 2],
+                       chosen[:, 1, 0] * x + chosen[:, 1, 1] * y + chosen[:, 1, 2])
+
+        return _accumulate_density(chunks(), tuple(bins), tuple(window)), mass
+
+    def generate_reference(self, points):
+        """
+        Generates points one at a time with the global `random` module. This is the
+        slow reference implementation the batched engine is checked against.
+
+        Returns:
+        - A tuple of two lists of floats with the x and y coordinates.
+        """
+        maps = self.coefficients.tolist()
+        indices = list(range(len(maps)))
+        weights = self.probabilities.tolist()
+        x, y = 0.0, 0.0
+        x_list, y_list = [], []
+        for _ in range(points):
+            # Pick a map according to its probability and apply it to the current point.
+            (a, b, e), (c, d, f) = maps[random.choices(indices, weights=weights)[0]]
+            x, y = a * x + b * y + e, c * x + d * y + f
+            x_list.append(x)
+            y_list.append(y)
+        return x_list, y_list
+
+    def estimate_extent(self, points=100000, seed=0, margin=0.02):
+        """
+        Estimates the bounding box (xmin, xmax, ymin, ymax) of the attractor from a
+        short chaos-game run, padded by `margin` of its size on every side.
+        """
+        x, y = self.generate(points, seed=seed)
+        xmin, xmax, ymin, ymax = x.min(), x.max(), y.min(), y.max()
+        pad_x = max(xmax - xmin, 1e-12) * margin
+        pad_y = max(ymax - ymin, 1e-12) * margin
+        return (float(xmin - pad_x), float(xmax + pad_x), float(ymin - pad_y), float(ymax + pad_y))
+
+
+# Coefficients of a few well-known systems, usable as IFS(PRESETS[name]).
+PRESETS = {
+    "fern": np.array([
+        [[0.85, 0.04, 0.0], [-0.04, 0.85, 1.6]],
+        [[-0.15, 0.28, 0.0], [0.26, 0.24, 0.44]],
+        [[0.2, -0.26, 0.0], [0.23, 0.22, 1.6]],
+        [[0.0, 0.0, 0.0], [0.0, 0.16, 0.0]],
+    ]),
+    "sierpinski": np.array([
+        [[0.5, 0.0, 0.0], [0.0, 0.5, 0.0]],
+        [[0.5, 0.0, 0.5], [0.0, 0.5, 0.0]],
+        [[0.5, 0.0, 0.25], [0.0, 0.5, 0.5]],
+    ]),
+    "dragon": np.array([
+        [[0.5, -0.5, 0.0], [0.5, 0.5, 0.0]],
+        [[-0.5, -0.5, 1.0], [0.5, -0.5, 0.0]],
+    ]),
+}
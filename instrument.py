@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# instrument.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Instrumentation
+# Timed spans around the generate, plot and export phases, with counters (points,
+# branches, iterations) and the derived per-second rates, plus throttled progress
+# reports from long-running loops. Nothing is reported until a hook is installed:
+#
+#   import instrument
+#   instrument.log_to()                      # forward to the "generate_fractals" logger
+#   instrument.add_hook(lambda event: ...)   # or to any callable
+#
+# Hooks receive Span events when a span ends and Progress events while work advances.
+# =====================
+
+from contextlib import contextmanager
+import functools
+import logging
+import time
+
+_hooks = []
+
+# Minimum number of seconds between two progress events of the same task.
+progress_interval = 0.5
+_last_progress = {}
+
+
+class Span:
+    kind = "span"
+
+    def __init__(self, name, counters):
+        self.name = name
+        self.counters = dict(counters)
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def count(self, **counters):
+        """
+        Sets counters of the span, e.g. span.count(points=n).
+        """
+        self.counters.update(counters)
+
+    @property
+    def rates(self):
+        """
+        Per-second rate of every counter, e.g. {"points_per_s": ...}.
+        """
+        if not self.duration:
+            return {}
+        return {f"{name}_per_s": value / self.duration for name, value in self.counters.items()}
+
+    def __repr__(self):
+        details = ", ".join(f"{name}={value}" for name, value in self.counters.items())
+        rates = ", ".join(f"{name}={value:.0f}" for name, value in self.rates.items())
+        return f"{self.name}: {self.duration:.4f}s" + (f" ({details}; {rates})" if details else "")
+
+
+class Progress:
+    kind = "progress"
+
+    def __init__(self, name, done, total):
+        self.name = name
+        self.done = done
+        self.total = total
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 1.0
+
+    def __repr__(self):
+        return f"{self.name}: {self.done}/{self.total} ({self.fraction:.0%})"
+
+
+def add_hook(hook):
+    """
+    Installs a callable that receives every Span and Progress event. Returns the hook.
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def clear_hooks():
+    _hooks.clear()
+
+
+def enabled():
+    """
+    Returns True if any hook is installed.
+    """
+    return bool(_hooks)
+
+
+def log_to(logger=None, level=logging.INFO):
+    """
+    Installs a hook forwarding events to a logging.Logger ("generate_fractals" by default).
+    Returns the hook, so it can be removed with remove_hook().
+    """
+    logger = logger or logging.getLogger("generate_fractals")
+    return add_hook(lambda event: logger.log(level, "%r", event))
+
+
+def _emit(event):
+    for hook in list(_hooks):
+        hook(event)
+
+
+@contextmanager
+def span(name, **counters):
+    """
+    Times the enclosed block and reports it as a Span to the installed hooks.
+
+    Parameters:
+    - name: Name of the phase, e.g. "fern.generate".
+    - counters: Initial counters; more can be set on the yielded span with count().
+    """
+    record = Span(name, counters)
+    try:
+        yield record
+    finally:
+        record.duration = time.perf_counter() - record.start
+        if _hooks:
+            _emit(record)
+
+
+def timed(name, counters=None):
+    """
+    Decorates a method or function so every call is reported as a span named `name`.
+
+    Parameters:
+    - name: Name of the span.
+    - counters: Optional function of the instance (or, for a plain function, of its
+      first argument) returning the span's counters; it is called after the call
+      returns, and only when a hook is installed.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with span(name) as record:
+                result = method(self, *args, **kwargs)
+                if counters is not None and _hooks:
+                    record.count(**counters(self))
+            return result
+        return wrapper
+    return decorate
+
+
+def progress(name, done, total):
+    """
+    Reports that `done` of `total` units of the task `name` are complete. Events are
+    throttled to one per progress_interval seconds per task, except the final one.
+    """
+    if not _hooks:
+        return
+    now = time.perf_counter()
+    if done < total and now - _last_progress.get(name, float("-inf")) < progress_interval:
+        return
+    _last_progress[name] = now
+    _emit(Progress(name, done, total))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# lod.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Screen-space level of detail
+# Decides, from the figure size, DPI and view, which geometry can be seen at all
+# before it is handed to matplotlib: tree subtrees that project to less than a pixel
+# are dropped, and point clouds keep at most a few points per pixel.
+#
+#   keep = thin_points(points, figsize=(6, 9), dpi=100, per_pixel=1)
+#   ax.scatter(*points[keep].T)
+#
+# Points are placed on screen the way matplotlib lays out an auto-scaled plot: each
+# axis is stretched over the data range (in 3D, onto the default 4:4:3 box) and the
+# box is projected orthographically for the given elevation and azimuth, filling the
+# whole figure. This ignores margins and perspective, so it errs towards more pixels
+# than are really drawn, i.e. towards keeping geometry.
+# =====================
+
+import numpy as np
+
+BOX_ASPECT = (4, 4, 3)
+
+
+def _view_axes(elev, azim):
+    """
+    Returns the unit vectors of the screen's right and up directions in data space for
+    a 3D view with the given elevation and azimuth in degrees.
+    """
+    elev, azim = np.radians(elev), np.radians(azim)
+    right = np.array([-np.sin(azim), np.cos(azim), 0.0])
+    up = np.array([-np.sin(elev) * np.cos(azim), -np.sin(elev) * np.sin(azim), np.cos(elev)])
+    return np.stack([right, up])
+
+
+def screen_matrix(lower, upper, figsize, dpi, view=None):
+    """
+    Returns the linear map from data coordinates (relative to `lower`) to pixels.
+
+    Parameters:
+    - lower, upper: Lower and upper bounds of the data on each axis (2 or 3 values).
+    - figsize: Figure width and height in inches.
+    - dpi: Dots per inch.
+    - view: (elev, azim) in degrees for 3D data; None for 2D data.
+
+    Returns:
+    - A (2, dims) matrix M so that pixels = (points - lower) @ M.T.
+    """
+    lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+    span = np.where(upper > lower, upper - lower, 1.0)
+    pixels = np.asarray(figsize, dtype=float) * dpi
+    if view is None:
+        return np.diag(pixels / span)
+    aspect = np.asarray(BOX_ASPECT, dtype=float)
+    axes = _view_axes(*view)
+    # Scale the projected box so that it fits the figure.
+    corners = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)]) * aspect
+    projected = corners @ axes.T
+    fit = np.min(pixels / (projected.max(axis=0) - projected.min(axis=0)))
+    return fit * axes * (aspect / span)
+
+
+def thin_points(points, figsize, dpi, per_pixel=1, view=None):
+    """
+    Drops points that land in pixels already holding `per_pixel` earlier points.
+
+    Parameters:
+    - points: Array of shape (n, 2), or (n, 3) together with `view`.
+    - figsize, dpi, view: See screen_matrix().
+    - per_pixel: Number of points kept per pixel.
+
+    Returns:
+    - The indices of the kept points, in increasing order.
+    """
+    if per_pixel < 1:
+        raise ValueError("Points per pixel must be at least 1")
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.empty(0, dtype=np.intp)
+    lower, upper = points.min(axis=0), points.max(axis=0)
+    matrix = screen_matrix(lower, upper, figsize, dpi, view)
+    screen = (points - lower) @ matrix.T
+    screen -= screen.min(axis=0)
+    # Points on the far edge belong to the last pixel, not to one past it.
+    pixels = np.minimum(np.floor(screen), np.maximum(np.ceil(screen.max(axis=0)) - 1, 0)).astype(np.int64)
+    pixel = pixels[:, 0] * (pixels[:, 1].max() + 1) + pixels[:, 1]
+
+    # Rank each point among the points of its pixel, in input order.
+    order = np.argsort(pixel, kind='stable')
+    sorted_pixel = pixel[order]
+    first = np.flatnonzero(np.r_[True, sorted_pixel[1:] != sorted_pixel[:-1]])
+    rank = np.arange(len(order)) - np.repeat(first, np.diff(np.r_[first, len(order)]))
+    return np.sort(order[rank < per_pixel])
+
+
+def _subtree_reach(length, scale_factor, levels):
+    """
+    Returns, for each level, the distance from the end of a branch of that level to the
+    farthest point of its subtree: the summed lengths of the levels below it.
+    """
+    lengths = length * scale_factor ** np.arange(levels)
+    reach = np.cumsum(lengths[::-1])[::-1]
+    return np.r_[reach[1:], 0.0]
+
+
+def tree_lod_depth(tree, figsize, dpi, view, threshold=1.0, lower=None, upper=None):
+    """
+    Returns the number of tree levels worth drawing: the subtrees below the last of
+    them project to less than `threshold` pixels.
+
+    Every branch of a level has the same length, so all the subtrees rooted at a level
+    share one bound on their projected extent and the cut falls between two levels.
+
+    Parameters:
+    - tree: A FractalTree3D, generated or not.
+    - figsize, dpi, view: See screen_matrix().
+    - threshold: Projected size in pixels below which a subtree is dropped.
+    - lower, upper: Bounds of the drawn tree. Defaults to the bounds of tree.starts and
+      tree.ends or, before generation, of the first few levels of the tree, which are
+      slightly smaller and so keep slightly more levels.
+    """
+    if tree.depth == 0:
+        return 0
+    if lower is None or upper is None:
+        source = tree
+        if not len(tree.starts):
+            source = type(tree)(tree.base, tree.length, tree.direction, min(tree.depth, 4),
+                                tree.branch_angle, tree.scale_factor)
+            source.generate_points()
+        points = np.concatenate([source.starts, source.ends])
+        lower, upper = points.min(axis=0), points.max(axis=0)
+    matrix = screen_matrix(lower, upper, figsize, dpi, view)
+    # The largest factor by which the projection stretches any direction in data space.
+    stretch = np.linalg.norm(matrix, 2)
+    visible = 2 * _subtree_reach(tree.length, tree.scale_factor, tree.depth) * stretch >= threshold
+    return 1 + int(np.count_nonzero(visible[:-1]))
+
+
+def cull_tree(tree, figsize, dpi, view, threshold=1.0):
+    """
+    Returns a boolean mask over the tree's branches that drops every subtree projecting
+    to less than `threshold` pixels; see tree_lod_depth().
+    """
+    return tree.levels < tree_lod_depth(tree, figsize, dpi, view, threshold)
@@ -25,7 +25,7 @@ def main():
     ax3 = fig3.add_subplot(111, projection='3d')
                            
     # Plot Fractal Fern in the 1st subplot
-    fern = FractalFern(100000)
+    fern = FractalFern(100000, engine="numpy")
     fern.generate_points()  
     fern.plot(ax=ax1)  
 
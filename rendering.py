@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# rendering.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Rendering
+# matplotlib drawing code for the fern, tree and seashell. The geometry modules only
+# import this module (and with it matplotlib) when plot() is first called, so code
+# that only generates geometry, such as pool workers, never pays matplotlib's import cost.
+# =====================
+
+import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba_array
+from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+import numpy as np
+
+from lod import cull_tree, thin_points
+
+
+def _figure_view(ax):
+    """
+    Returns the figure size in inches and the DPI of the figure holding `ax`.
+    """
+    return tuple(ax.figure.get_size_inches()), ax.figure.dpi
+
+
+def plot_fern(fern, ax=None, scale_factor=.01, gamma=2.2, cmap='Greens', max_per_pixel=None):
+    """
+    Plots the generated points of a FractalFern on the provided axes; see FractalFern.plot.
+    """
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(6, 9))
+
+    if fern.mode == "density":
+        _plot_fern_density(fern, ax, scale_factor, gamma, cmap)
+        return
+    
+    # Assuming fern.x_points and fern.y_points are populated by generate_points()
+    scaled_x_points = np.asarray(fern.x_points) * scale_factor
+    scaled_y_points = np.asarray(fern.y_points) * scale_factor
+    if max_per_pixel is not None:
+        keep = thin_points(np.stack([scaled_x_points, scaled_y_points], axis=1), *_figure_view(ax), max_per_pixel)
+        scaled_x_points, scaled_y_points = scaled_x_points[keep], scaled_y_points[keep]
+
+    ax.scatter(scaled_x_points, scaled_y_points, s=0.1, color='green')
+    #ax.scatter(fern.x_points, fern.y_points, s=0.1, color='green')
+    ax.set_title("Barnsley Fern")
+    ax.axis('off')  # Optionally turn off the axis if desired
+
+    # If ax was provided, plt.show() might be managed outside this method
+    if ax is None:
+        plt.show()
+
+
+def _plot_fern_density(fern, ax, scale_factor, gamma, cmap):
+    """
+    Draws the density grid with imshow, using log/gamma tone mapping so that both
+    the sparse stem and the dense leaflets remain visible.
+    """
+    counts = fern.density
+    peak = counts.max()
+    image = np.log1p(counts) / np.log1p(peak) if peak > 0 else np.zeros(counts.shape)
+    image **= 1.0 / gamma
+    xmin, xmax, ymin, ymax = fern.extent
+    ax.imshow(image, origin='lower', cmap=cmap, interpolation='nearest', aspect='auto',
+              extent=(xmin * scale_factor, xmax * scale_factor, ymin * scale_factor, ymax * scale_factor))
+    ax.set_title("Barnsley Fern")
+    ax.axis('off')
+
+
+def plot_tree(tree, ax=None, set_limits=True, view_init_elev=10, view_init_azim=60,
+              color='saddlebrown', tip_color='olivedrab', twig_length=None, twig_size=1, lod_threshold=None):
+    """
+    Draws the branches of a FractalTree3D through a single Line3DCollection; see FractalTree3D.plot.
+    """
+    if ax is None:
+        fig = plt.figure(figsize=(10, 10))
+        ax = fig.add_subplot(111, projection='3d')
+
+    starts, ends, levels = tree.starts, tree.ends, tree.levels
+    if lod_threshold is not None:
+        visible = cull_tree(tree, *_figure_view(ax), (view_init_elev, view_init_azim), lod_threshold)
+        starts, ends, levels = starts[visible], ends[visible], levels[visible]
+    fraction = levels / max(tree.depth - 1, 1)
+    colors = (1 - fraction)[:, None] * to_rgba_array(color) + fraction[:, None] * to_rgba_array(tip_color)
+
+    if twig_length is not None:
+        twigs = np.linalg.norm(ends - starts, axis=1) < twig_length
+        ax.scatter(ends[twigs, 0], ends[twigs, 1], ends[twigs, 2], s=twig_size,
+                   c=colors[twigs], depthshade=False)
+        starts, ends, levels, colors = starts[~twigs], ends[~twigs], levels[~twigs], colors[~twigs]
+
+    segments = np.stack([starts, ends], axis=1)
+    ax.add_collection3d(Line3DCollection(segments, colors=colors, linewidths=tree.depth - levels))
+
+    if set_limits and len(tree.starts):
+        points = np.concatenate([tree.starts, tree.ends])
+        ax.auto_scale_xyz(points[:, 0], points[:, 1], points[:, 2], had_data=False)
+
+    ax.view_init(elev=view_init_elev, azim=view_init_azim)
+    ax.axis('off')
+
+
+def plot_seashell(shell, ax=None, max_per_pixel=None):
+    """
+    Plots a DoubleSeashell's point cloud or mesh on the provided 3D axes; see DoubleSeashell.plot.
+    """
+    if ax is None:
+        fig = plt.figure(figsize=(8, 6))
+        ax = fig.add_subplot(111, projection='3d')
+    
+    if shell.mode == "mesh":
+        # A few thousand shaded triangles give a solid surface in one collection
+        x, y, z = shell.vertices.T
+        ax.plot_trisurf(z, x, y, triangles=shell.triangles, color='goldenrod', linewidth=0, shade=True)
+    else:
+        # Plot the generated seashell points on the provided axes
+        points = np.stack([shell.z_shell, shell.x_shell, shell.y_shell], axis=1)
+        if max_per_pixel is not None:
+            points = points[thin_points(points, *_figure_view(ax), max_per_pixel, (ax.elev, ax.azim))]
+        ax.scatter(points[:, 0], points[:, 1], points[:, 2], color='goldenrod')
+    ax.set_xlabel('X axis')
+    ax.set_ylabel('Y axis')
+    ax.set_zlabel('Z axis')
+    ax.set_title("3D Double Seashell")
+    ax.axis('off')  # Optionally turn off the axis if desired
+
+  
+    # If ax was provided, plt.show() might be managed outside this method
+    if ax is None:
+        plt.show()
@@ -14,13 +14,56 @@
 # =====================
 
 
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
 import numpy as np
+from instrument import timed
+from utils import linspace_slice, rechunk, reusable
+
+MODES = ("points", "mesh")
+
+def _frenet_frames(curve):
+    """
+    Computes the Frenet frame (tangent, normal, binormal) at every point of a sampled curve.
+    Where the curvature vanishes, the normal falls back to a fixed direction perpendicular
+    to the tangent.
+
+    Parameters:
+    - curve: (n, 3) array of points, n >= 2.
+    Returns:
+    - Three (n, 3) arrays of unit vectors.
+    """
+    tangent = np.gradient(curve, axis=0)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    normal = np.gradient(tangent, axis=0) if len(curve) > 2 else np.zeros_like(tangent)
+    normal -= np.sum(normal * tangent, axis=1, keepdims=True) * tangent
+    length = np.linalg.norm(normal, axis=1, keepdims=True)
+    flat = length[:, 0] < 1e-12
+    if np.any(flat):
+        helper = np.where(np.abs(tangent[flat, 2:3]) < 0.9, [0.0, 0.0, 1.0], [1.0, 0.0, 0.0])
+        normal[flat] = np.cross(tangent[flat], helper)
+        length[flat] = np.linalg.norm(normal[flat], axis=1, keepdims=True)
+    normal /= length
+    binormal = np.cross(tangent, normal)
+    return tangent, normal, binormal
+
+
+def _tube_triangles(n_rings, ring_samples):
+    """
+    Builds the triangle indices joining consecutive rings of a tube whose vertices are
+    stored ring by ring, ring_samples vertices per ring.
+    """
+    ring = np.arange(n_rings - 1)[:, None] * ring_samples
+    j = np.arange(ring_samples)[None, :]
+    j_next = (j + 1) % ring_samples
+    v00, v01 = ring + j, ring + j_next
+    v10, v11 = v00 + ring_samples, v01 + ring_samples
+    first = np.stack([v00, v10, v11], axis=-1)
+    second = np.stack([v00, v11, v01], axis=-1)
+    return np.stack([first, second], axis=2).reshape(-1, 3)
 
 
 class DoubleSeashell:
-    def __init__(self, a, b, c, n_turns, n_turns_inv, thickness, points=1000):
+    def __init__(self, a, b, c, n_turns, n_turns_inv, thickness, points=1000, ring_samples=10,
+                 mode="points"):
         """
         Initializes the DoubleSeashell object with specific parameters.
 
@@ -30,6 +73,10 @@ class DoubleSeashell:
         - n_turns_inv: Number of turns for the inverse shell.
         - thickness: Thickness of the shell.
         - points: Number of points to generate for each curve.
+        - ring_samples: Number of points on the cross-section ring around each curve point.
+        - mode: "points" for the point cloud, or "mesh" for a triangle mesh of two tubes
+          swept along the spirals. A mesh looks solid with far fewer points (a few
+          hundred per curve is usually enough).
         """
 
                 # Type and value checking for each parameter
@@ -42,6 +89,15 @@ class DoubleSeashell:
         if not all(isinstance(param, int) and param > 0 for param in [n_turns, n_turns_inv]):
             raise ValueError("Parameters n_turns and n_turns_inv must be positive integers.")
 
+        if not isinstance(ring_samples, int) or ring_samples <= 0:
+            raise ValueError("Parameter ring_samples must be a positive integer.")
+
+        if mode not in MODES:
+            raise ValueError(f"Parameter mode must be one of {MODES}.")
+
+        if mode == "mesh" and (points < 2 or ring_samples < 3):
+            raise ValueError("Mesh mode needs at least 2 points and 3 ring samples.")
+
         self.a = a
         self.b = b
         self.c = c
@@ -49,78 +105,188 @@ class DoubleSeashell:
         self.n_turns_inv = n_turns_inv
         self.thickness = thickness
         self.points = points
+        self.ring_samples = ring_samples
+        self.mode = mode
 
-    def generate_points(self):
+    def _spiral_paths(self, lo=0, hi=None):
         """
-        Generates points for a 3D double seashell curve and stores them in instance variables.
+        Computes the centre lines of the two shells.
+
+        Parameters:
+        - lo, hi: Optional range of path samples to compute, out of the 2 * points samples.
 
         Returns:
-        - x, y, z coordinates of the double shell.
+        - x, y, z arrays: the first spiral followed by the inverse spiral, samples lo to hi.
         """
-        print("Generating the seashell...")
+        n = self.points
+        hi = 2 * n if hi is None else hi
+
         # First spiral calculation
-        theta = np.linspace(0, 2 * np.pi * self.n_turns, self.points)
+        theta_end = 2 * np.pi * self.n_turns
+        theta = linspace_slice(0, theta_end, n, min(lo, n), min(hi, n))
         r = self.a + self.b * theta
-        x, y, z = r * np.cos(theta), r * np.sin(theta), self.c * theta
-
-        # Shell construction
-        # Initialize empty lists to hold the x, y, and z coordinates of the shell's surface points.
-
-        self.x_shell, self.y_shell, self.z_shell = [], [], []
-            
-        # Iterate through each point (xi, yi, zi) that defines the spiral path of the shell.
-        for xi, yi, zi in zip(x, y, z):
-
-        # For each point on the spiral, generate a circle perpendicular to the spiral's path.
-        # This circle's radius is determined by the shell's thickness parameter.
-        # `np.linspace(0, 2 * np.pi, 10)` creates 10 points evenly spaced around the circle.
-            for t in np.linspace(0, 2 * np.pi, 10):
-
-                # Calculate the x and y coordinates of each point on the circle using trigonometric functions.
-                # The circle's center is offset from the spiral path by the shell's thickness.
-                # This effectively "wraps" a circular cross-section around the spiral path, creating the shell's thickness.
-                self.x_shell.append(xi + self.thickness * np.cos(t))
-                self.y_shell.append(yi + self.thickness * np.sin(t))
-                
-                # The z coordinate is the same as the current point on the spiral, keeping the circle's plane perpendicular to the spiral's path.
-                self.z_shell.append(zi)
-
-        # Inverse shell calculation
-        theta_inv = np.linspace(0, 2 * np.pi * self.n_turns_inv, self.points)
-        r_inv_start = self.a + self.b * theta[-1]
-        r_inv_end = self.a
-        r_inv = np.linspace(r_inv_start, r_inv_end, self.points)
-        x_inv, y_inv, z_inv = r_inv * np.cos(theta_inv), r_inv * np.sin(theta_inv), self.c * theta_inv + z[-1]
-
-        for xi, yi, zi in zip(x_inv, y_inv, z_inv):
-            for t in np.linspace(0, 2 * np.pi, 10):
-                self.x_shell.append(xi + self.thickness * np.cos(t))
-                self.y_shell.append(yi + self.thickness * np.sin(t))
-                self.z_shell.append(zi)
-
-
-    def plot(self, ax=None):
+
+        # Inverse shell calculation: the radius shrinks back to `a` while climbing from the
+        # top of the first spiral.
+        r_end = self.a + self.b * theta_end
+        theta_inv = linspace_slice(0, 2 * np.pi * self.n_turns_inv, n, max(lo - n, 0), max(hi - n, 0))
+        r_inv = linspace_slice(r_end, self.a, n, max(lo - n, 0), max(hi - n, 0))
+
+        angles = np.concatenate([theta, theta_inv])
+        radii = np.concatenate([r, r_inv])
+        z = np.concatenate([self.c * theta, self.c * theta_inv + self.c * theta_end])
+        return radii * np.cos(angles), radii * np.sin(angles), z
+
+    @timed("seashell.generate", lambda self: self._counters())
+    def generate_points(self, cache=None, reuse=False):
+        """
+        Generates points for a 3D double seashell curve and stores them in instance variables.
+
+        Every point of the two spirals is surrounded by a ring of `ring_samples` points of
+        radius `thickness`.
+
+        Parameters:
+        - cache: Optional GeometryCache. The geometry is loaded from it when present and
+          stored in it otherwise.
+        - reuse: Fill the point arrays of the previous call in place when the number of
+          points is unchanged, instead of allocating new ones (points mode). Arrays
+          obtained from the previous call then hold the new points too.
+
+        Returns:
+        - x, y, z coordinates of the double shell as contiguous float64 arrays of
+          length 2 * points * ring_samples. In mesh mode, the vertices and triangles
+          returned by generate_mesh().
+        """
+        if cache is not None and cache.restore(self):
+            return self._result()
+
+        if self.mode == "mesh":
+            self.generate_mesh()
+        else:
+            self._generate_shell_points(reuse)
+
+        if cache is not None:
+            cache.save(self)
+        return self._result()
+
+    def _counters(self):
+        if self.mode == "mesh":
+            return {"vertices": len(self.vertices), "triangles": len(self.triangles)}
+        return {"points": len(self.x_shell)}
+
+    def _result(self):
+        if self.mode == "mesh":
+            return self.vertices, self.triangles
+        return self.x_shell, self.y_shell, self.z_shell
+
+    def _cache_params(self):
+        """
+        Parameters that determine the generated geometry.
+        """
+        return {"a": self.a, "b": self.b, "c": self.c, "n_turns": self.n_turns, "n_turns_inv": self.n_turns_inv,
+                "thickness": self.thickness, "points": self.points, "ring_samples": self.ring_samples,
+                "mode": self.mode}
+
+    def _geometry(self):
+        if self.mode == "mesh":
+            return {"vertices": self.vertices, "triangles": self.triangles}
+        return {"x_shell": self.x_shell, "y_shell": self.y_shell, "z_shell": self.z_shell}
+
+    def _set_geometry(self, arrays):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def _generate_shell_points(self, reuse=False):
+        """
+        Builds the point cloud in one broadcast over (spiral samples x ring samples), so the
+        cost is linear in `points`.
+        """
+        x, y, z = self._spiral_paths()
+        ring_x, ring_y = self._ring()
+
+        # Each ring lies in the plane z = const around its spiral point.
+        size = len(x) * self.ring_samples
+        if reuse:
+            self.x_shell, self.y_shell, self.z_shell = (reusable(getattr(self, name, None), (size,))
+                                                        for name in ("x_shell", "y_shell", "z_shell"))
+        else:
+            self.x_shell, self.y_shell, self.z_shell = np.empty(size), np.empty(size), np.empty(size)
+        np.add(x[:, None], ring_x, out=self.x_shell.reshape(-1, self.ring_samples))
+        np.add(y[:, None], ring_y, out=self.y_shell.reshape(-1, self.ring_samples))
+        self.z_shell.reshape(-1, self.ring_samples)[:] = z[:, None]
+
+    def _ring(self):
+        """
+        Returns the x and y offsets of the ring_samples points of a cross-section ring.
+        """
+        t = np.linspace(0, 2 * np.pi, self.ring_samples)
+        return self.thickness * np.cos(t), self.thickness * np.sin(t)
+
+    def _shell_points(self, lo, hi):
+        """
+        Returns the rings around path samples lo to hi as ((hi - lo) * ring_samples, 3) rows,
+        in the same order as generate_points().
+        """
+        x, y, z = self._spiral_paths(lo, hi)
+        ring_x, ring_y = self._ring()
+        points = np.empty((len(x), self.ring_samples, 3))
+        np.add(x[:, None], ring_x, out=points[:, :, 0])
+        np.add(y[:, None], ring_y, out=points[:, :, 1])
+        points[:, :, 2] = z[:, None]
+        return points.reshape(-1, 3)
+
+    def iter_chunks(self, chunk_size=1 << 16):
+        """
+        Generates the point cloud of generate_points() in fixed-size blocks, holding about
+        one block in memory at a time.
+
+        Yields:
+        - float64 arrays of shape (chunk_size, 3) holding x, y and z; the last may be shorter.
+        """
+        samples = max(1, chunk_size // self.ring_samples)
+        blocks = (self._shell_points(lo, min(lo + samples, 2 * self.points))
+                  for lo in range(0, 2 * self.points, samples))
+        return rechunk(blocks, chunk_size)
+
+    def generate_mesh(self):
+        """
+        Generates a triangle mesh of the double shell and stores it in self.vertices and
+        self.triangles.
+
+        Each spiral is swept by a circular cross-section lying perpendicular to the curve,
+        oriented by the curve's Frenet frame (tangent, normal, binormal). Neighbouring rings
+        share their vertices, and each pair of rings is joined by 2 * ring_samples triangles.
+
+        Returns:
+        - vertices: (2 * points * ring_samples, 3) float64 array.
+        - triangles: (2 * (points - 1) * 2 * ring_samples, 3) array of vertex indices.
+        """
+        x, y, z = self._spiral_paths()
+        path = np.stack([x, y, z], axis=1)
+        phi = np.linspace(0, 2 * np.pi, self.ring_samples, endpoint=False)
+        ring = self.thickness * np.stack([np.cos(phi), np.sin(phi)], axis=1)
+
+        vertices, triangles = [], []
+        for curve in (path[:self.points], path[self.points:]):
+            tangent, normal, binormal = _frenet_frames(curve)
+            rings = curve[:, None, :] + ring[:, 0, None] * normal[:, None, :] + ring[:, 1, None] * binormal[:, None, :]
+            triangles.append(_tube_triangles(len(curve), self.ring_samples) + sum(len(v) for v in vertices))
+            vertices.append(rings.reshape(-1, 3))
+
+        self.vertices = np.concatenate(vertices)
+        self.triangles = np.concatenate(triangles)
+        return self.vertices, self.triangles
+
+    @timed("seashell.plot", lambda self: self._counters())
+    def plot(self, ax=None, max_per_pixel=None):
         """
         Plots the generated points of the Double Seashell using matplotlib on the provided axes.
 
         Parameters:
         - ax: Optional. A matplotlib 3D axes object where the seashell will be plotted.
              If None, a new figure and 3D axes will be created.
+        - max_per_pixel: Optional. Only this many points are drawn per pixel of the figure,
+          as projected with the axes' current view (points mode).
         """
-        print("Plotting the seashell...")
-        if ax is None:
-            fig = plt.figure(figsize=(8, 6))
-            ax = fig.add_subplot(111, projection='3d')
-        
-        # Plot the generated seashell points on the provided axes
-        ax.scatter(self.z_shell, self.x_shell, self.y_shell, color='goldenrod')
-        ax.set_xlabel('X axis')
-        ax.set_ylabel('Y axis')
-        ax.set_zlabel('Z axis')
-        ax.set_title("3D Double Seashell")
-        ax.axis('off')  # Optionally turn off the axis if desired
-
-  
-        # If ax was provided, plt.show() might be managed outside this method
-        if ax is None:
-            plt.show()
\ No newline at end of file
+        from rendering import plot_seashell
+        plot_seashell(self, ax, max_per_pixel)
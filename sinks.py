@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# sinks.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Chunk sinks
+# Destinations for the fixed-size blocks yielded by the generators' iter_chunks(),
+# so point clouds larger than RAM can be written out with only one block in memory.
+#
+#   fern = FractalFern(10**9, engine="numpy", seed=1)
+#   with MemmapSink("fern.f64", rows=fern.points, columns=2) as sink:
+#       write_chunks(fern.iter_chunks(), sink)
+# =====================
+
+import numpy as np
+
+
+class MemmapSink:
+    def __init__(self, path, rows, columns, dtype=np.float64):
+        """
+        Preallocates a (rows, columns) np.memmap at `path` and fills it block by block.
+
+        Parameters:
+        - path: File to create (overwritten if it exists).
+        - rows, columns: Shape of the whole dataset.
+        - dtype: Data type stored in the file.
+        """
+        if rows <= 0 or columns <= 0:
+            raise ValueError("Rows and columns must be positive")
+        self.array = np.memmap(path, dtype=dtype, mode='w+', shape=(rows, columns))
+        self.offset = 0
+
+    def write(self, block):
+        """
+        Copies a (n, columns) block into the next n rows of the memmap.
+        """
+        end = self.offset + len(block)
+        if end > len(self.array):
+            raise ValueError("Block does not fit in the preallocated memmap")
+        self.array[self.offset:end] = block
+        self.offset = end
+
+    def close(self):
+        """
+        Flushes the memmap to disk.
+        """
+        self.array.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BinaryFileSink:
+    def __init__(self, path, dtype=np.float64, append=False):
+        """
+        Writes blocks as raw rows of `dtype` to a binary file, one tofile call per block.
+
+        Parameters:
+        - path: File to write.
+        - dtype: Data type written; blocks are converted if needed.
+        - append: Append to an existing file instead of truncating it.
+        """
+        self.dtype = np.dtype(dtype)
+        self.file = open(path, 'ab' if append else 'wb')
+        self.rows = 0
+
+    def write(self, block):
+        """
+        Appends a block to the file.
+        """
+        np.ascontiguousarray(block, dtype=self.dtype).tofile(self.file)
+        self.rows += len(block)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_chunks(chunks, sink):
+    """
+    Writes every block of `chunks` to `sink`.
+
+    Returns:
+    - The number of rows written.
+    """
+    rows = 0
+    for block in chunks:
+        sink.write(block)
+        rows += len(block)
+    return rows
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from animate import SweepRenderer, render_sweep, sweep_frames
+
+TREE = dict(base=[0, 0, 0], length=1, direction=[0.001, 0.001, 1], depth=3, branch_angle=0.5, scale_factor=0.5)
+SHELL = dict(a=0.1, b=0.2, c=0.15, n_turns=3, n_turns_inv=2, thickness=0.05, points=50)
+
+class TestAnimate(unittest.TestCase):
+    def test_sweep_frames(self):
+        """Test that sweeps are split into per-frame parameters of equal length."""
+        frames = sweep_frames({"branch_angle": [0.1, 0.2], "scale_factor": [0.5, 0.6]})
+        self.assertEqual(frames[1], {"branch_angle": 0.2, "scale_factor": 0.6})
+        with self.assertRaises(ValueError):
+            sweep_frames({"branch_angle": [0.1, 0.2], "scale_factor": [0.5]})
+
+    def test_tree_frames_reuse_figure_and_buffers(self):
+        """Test that frames with the same depth update one collection and refill the same arrays."""
+        renderer = SweepRenderer("tree", TREE, {"branch_angle": [0.3, 0.6, 0.9]}, figsize=(2, 2), dpi=40)
+        first = renderer.rgba(0)
+        collection, starts = renderer.ax.collections[0], renderer._fractal.starts
+        second = renderer.rgba(1)
+        self.assertIs(renderer.ax.collections[0], collection)
+        self.assertEqual(len(renderer.ax.collections), 1)
+        self.assertIs(renderer._fractal.starts, starts)
+        self.assertEqual(first.shape, (80, 80, 4))
+        self.assertFalse(np.array_equal(first, second))
+
+    def test_topology_change_rebuilds_collection(self):
+        """Test that sweeping the depth replaces the collection with one of the new size."""
+        renderer = SweepRenderer("tree", TREE, {"depth": [2, 3]}, figsize=(2, 2), dpi=40)
+        renderer.draw(0)
+        renderer.draw(1)
+        self.assertEqual(len(renderer.ax.collections), 1)
+        self.assertEqual(len(renderer.ax.collections[0].get_linewidths()), 21)
+
+    def test_render_sweep_outputs(self):
+        """Test that frames are written as numbered PNGs by worker processes, and as a GIF."""
+        with tempfile.TemporaryDirectory() as directory:
+            frames = os.path.join(directory, "frames")
+            paths = render_sweep("seashell", SHELL, {"thickness": np.linspace(0.02, 0.2, 4)}, frames,
+                                 figsize=(2, 2), dpi=40, workers=2)
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             [f"frame_{i:05d}.png" for i in range(4)])
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+            gif = render_sweep("tree", TREE, {"scale_factor": [0.4, 0.5, 0.6]}, os.path.join(directory, "tree.gif"),
+                               figsize=(2, 2), dpi=40)
+            with open(gif, "rb") as f:
+                self.assertEqual(f.read(3), b"GIF")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from cache import GeometryCache
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+from seashell import DoubleSeashell
+
+def make_tree(**kwargs):
+    params = dict(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                  depth=4, branch_angle=np.pi / 4, scale_factor=0.5)
+    params.update(kwargs)
+    return FractalTree3D(**params)
+
+class TestGeometryCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_hit_loads_memory_mapped_arrays(self):
+        """Test that a second generation with the same parameters is loaded memory-mapped."""
+        cache = GeometryCache(self.directory)
+        first = make_tree()
+        first.generate_points(cache=cache)
+        second = make_tree()
+        second._generate = lambda: self.fail("cache hit must skip generation")
+        second.generate_points(cache=cache)
+        self.assertIsInstance(second.ends, np.memmap)
+        np.testing.assert_array_equal(first.ends, second.ends)
+        np.testing.assert_array_equal(first.levels, second.levels)
+
+    def test_key_depends_on_parameters_and_seed(self):
+        """Test that different parameters or seeds give different keys."""
+        cache = GeometryCache(self.directory)
+        self.assertNotEqual(cache.key(make_tree(depth=4)), cache.key(make_tree(depth=5)))
+        self.assertNotEqual(cache.key(FractalFern(engine="numpy", seed=1)),
+                            cache.key(FractalFern(engine="numpy", seed=2)))
+        self.assertEqual(cache.key(make_tree()), cache.key(make_tree()))
+
+    def test_unseeded_fern_is_not_cached(self):
+        """Test that non-reproducible fern output is never stored."""
+        cache = GeometryCache(self.directory)
+        FractalFern(engine="numpy").generate_points(cache=cache)
+        self.assertEqual(cache.entries(), [])
+
+    def test_seashell_round_trip(self):
+        """Test that seashell meshes survive a round trip through the cache."""
+        cache = GeometryCache(self.directory)
+        params = dict(a=0.1, b=0.2, c=0.15, n_turns=2, n_turns_inv=1, thickness=0.05, points=30, mode="mesh")
+        vertices, triangles = DoubleSeashell(**params).generate_points(cache=cache)
+        cached_vertices, cached_triangles = DoubleSeashell(**params).generate_points(cache=cache)
+        np.testing.assert_array_equal(vertices, cached_vertices)
+        np.testing.assert_array_equal(triangles, cached_triangles)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test that the oldest entries are evicted once the byte limit is exceeded."""
+        cache = GeometryCache(self.directory, max_bytes=10000)
+        old, used, new = (cache.key(make_tree(depth=d)) for d in (1, 2, 3))
+        cache.store(old, {"a": np.zeros(500)})
+        cache.store(used, {"a": np.zeros(500)})
+        os.utime(os.path.join(self.directory, old), (0, 0))
+        os.utime(os.path.join(self.directory, used), (1, 1))
+        self.assertIsNotNone(cache.load(used))
+        cache.store(new, {"a": np.zeros(500)})
+        self.assertIsNone(cache.load(old))
+        self.assertIsNotNone(cache.load(used))
+        self.assertIsNotNone(cache.load(new))
+        self.assertLessEqual(cache.size(), 10000)
+
+if __name__ == '__main__':
+    unittest.main()
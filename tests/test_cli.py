@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+import unittest
+import cli
+
+class TestCli(unittest.TestCase):
+    def test_job_from_flags(self):
+        """Test that subcommand flags are split into constructor and plot arguments."""
+        args = cli.build_parser().parse_args(["tree", "-o", "t.png", "--depth", "3", "--azim", "30"])
+        job = cli.job_from_args(args)
+        self.assertEqual(job["kind"], "tree")
+        self.assertEqual(job["params"], {"depth": 3})
+        self.assertEqual(job["plot"], {"view_init_azim": 30.0})
+
+    def test_render_job_writes_output(self):
+        """Test that a job renders headlessly to the requested file."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "fern.svg")
+            result = cli.render_job({"kind": "fern", "output": output, "params": {"points": 5000}})
+            self.assertTrue(os.path.getsize(output) > 0)
+            self.assertGreaterEqual(result["total"], result["generate"])
+
+    def test_load_jobs(self):
+        """Test that JSON and TOML job files yield the same jobs."""
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, "jobs.json")
+            with open(json_path, "w") as f:
+                json.dump({"jobs": [{"kind": "tree", "output": "t.png", "params": {"depth": 2}}]}, f)
+            toml_path = os.path.join(directory, "jobs.toml")
+            with open(toml_path, "w") as f:
+                f.write('[[jobs]]\nkind = "tree"\noutput = "t.png"\nparams = { depth = 2 }\n')
+            self.assertEqual(cli.load_jobs(json_path), cli.load_jobs(toml_path))
+
+    def test_invalid_output_format(self):
+        """Test that an unsupported output format raises a ValueError."""
+        with self.assertRaises(ValueError):
+            cli.render_job({"kind": "fern", "output": "fern.jpg"})
+
+if __name__ == '__main__':
+    unittest.main()
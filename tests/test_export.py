@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from export import export_fern, export_seashell, export_tree
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+from seashell import DoubleSeashell
+
+def read_ply(path):
+    """Splits a binary PLY file into its header lines and body bytes."""
+    with open(path, "rb") as f:
+        data = f.read()
+    end = data.index(b"end_header\n") + len(b"end_header\n")
+    return data[:end].decode("ascii").splitlines(), data[end:]
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_fern_ply(self):
+        """Test that fern points are written as float32 PLY vertices with z = 0."""
+        fern = FractalFern(points=6000, engine="numpy", seed=1)
+        path = os.path.join(self.directory, "fern.ply")
+        export_fern(fern, path, chunk_size=1000)
+        header, body = read_ply(path)
+        self.assertIn("format binary_little_endian 1.0", header)
+        self.assertIn("element vertex 6000", header)
+        vertices = np.frombuffer(body, dtype='<f4').reshape(-1, 3)
+        x, y = fern.generate_points()
+        np.testing.assert_allclose(vertices[:, 0], x, rtol=1e-6)
+        np.testing.assert_allclose(vertices[:, 1], y, rtol=1e-6)
+        self.assertTrue(np.all(vertices[:, 2] == 0))
+
+    def test_seashell_mesh_ply(self):
+        """Test that seashell meshes are written with triangle faces."""
+        shell = DoubleSeashell(a=0.1, b=0.2, c=0.15, n_turns=2, n_turns_inv=1, thickness=0.05, points=20,
+                               ring_samples=6, mode="mesh")
+        vertices, triangles = shell.generate_points()
+        path = os.path.join(self.directory, "shell.ply")
+        export_seashell(shell, path)
+        header, body = read_ply(path)
+        self.assertIn(f"element face {len(triangles)}", header)
+        faces = np.frombuffer(body[12 * len(vertices):], dtype=[("count", "u1"), ("indices", "<i4", (3,))])
+        self.assertTrue(np.all(faces["count"] == 3))
+        np.testing.assert_array_equal(faces["indices"], triangles)
+
+    def test_tree_ply_edges_and_obj_lines(self):
+        """Test that tree branches are written as vertex pairs joined by edges or lines."""
+        tree = FractalTree3D(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                             depth=3, branch_angle=np.pi / 4, scale_factor=0.5)
+        ply_path = os.path.join(self.directory, "tree.ply")
+        export_tree(tree, ply_path, chunk_size=4)
+        header, body = read_ply(ply_path)
+        self.assertIn("element vertex 42", header)
+        self.assertIn("element edge 21", header)
+        edges = np.frombuffer(body[12 * 42:], dtype='<i4').reshape(-1, 2)
+        np.testing.assert_array_equal(edges, np.arange(42).reshape(-1, 2))
+
+        obj_path = os.path.join(self.directory, "tree.obj")
+        export_tree(tree, obj_path)
+        with open(obj_path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(sum(line.startswith("v ") for line in lines), 42)
+        self.assertEqual(lines[-1], "l 41 42")
+
+    def test_unknown_format(self):
+        """Test that an unknown extension raises a ValueError."""
+        with self.assertRaises(ValueError):
+            export_fern(FractalFern(engine="numpy"), os.path.join(self.directory, "fern.xyz"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from fractal_fern import FractalFern
 
 class TestFractalFernOO(unittest.TestCase):
@@ -38,5 +39,75 @@ class TestFractalFernOO(unittest.TestCase):
         self.assertEqual(len(fern.x_points), 5000)
         self.assertEqual(len(fern.y_points), 5000)
 
+    def test_numpy_engine_points_type(self):
+        """Test that the numpy engine returns float64 arrays of the requested length."""
+        fern = FractalFern(points=20000, engine="numpy", seed=1)
+        x, y = fern.generate_points()
+        self.assertIsInstance(x, np.ndarray)
+        self.assertEqual(x.dtype, np.float64)
+        self.assertEqual(x.shape, (20000,))
+        self.assertEqual(y.shape, (20000,))
+
+    def test_numpy_engine_reproducible(self):
+        """Test that the numpy engine is reproducible for a given seed."""
+        x1, y1 = FractalFern(points=8000, engine="numpy", seed=7).generate_points()
+        x2, y2 = FractalFern(points=8000, engine="numpy", seed=7).generate_points()
+        np.testing.assert_array_equal(x1, x2)
+        np.testing.assert_array_equal(y1, y2)
+
+    def test_numpy_engine_matches_reference_bounds(self):
+        """Test that numpy engine points lie within the fern's bounding box."""
+        x, y = FractalFern(points=50000, engine="numpy", seed=3).generate_points()
+        self.assertTrue(np.all((x > -2.2) & (x < 2.7)))
+        self.assertTrue(np.all((y >= 0.0) & (y < 10.0)))
+
+    def test_invalid_engine(self):
+        """Test that an unknown engine raises a ValueError."""
+        with self.assertRaises(ValueError):
+            FractalFern(points=5000, engine="fortran")
+
+    def test_density_mode_counts_every_point(self):
+        """Test that density mode bins every point into a grid of the requested size."""
+        fern = FractalFern(points=30000, engine="numpy", seed=5, mode="density",
+                           bins=(40, 60), chunk_size=4096)
+        density = fern.generate_points()
+        self.assertEqual(density.shape, (60, 40))
+        self.assertEqual(density.sum(), 30000)
+
+    def test_density_mode_matches_point_mode(self):
+        """Test that streaming accumulation matches binning the full point set."""
+        points = FractalFern(points=20000, engine="numpy", seed=9)
+        x, y = points.generate_points()
+        density = FractalFern(points=20000, engine="numpy", seed=9, mode="density",
+                              bins=(30, 50), chunk_size=5000).generate_points()
+        expected, _, _ = np.histogram2d(y, x, bins=(50, 30), range=((0.0, 10.0), (-2.2, 2.7)))
+        np.testing.assert_array_equal(density, expected)
+
+    def test_density_mode_requires_numpy_engine(self):
+        """Test that density mode with the reference engine raises a ValueError."""
+        with self.assertRaises(ValueError):
+            FractalFern(points=5000, mode="density")
+
+    def test_workers_do_not_change_output(self):
+        """Test that the output for a seed is identical for any number of workers."""
+        kwargs = dict(points=2500000, engine="numpy", seed=11, mode="density", bins=(20, 30))
+        single = FractalFern(workers=1, **kwargs).generate_points()
+        parallel = FractalFern(workers=2, **kwargs).generate_points()
+        np.testing.assert_array_equal(single, parallel)
+        self.assertEqual(parallel.sum(), 2500000)
+
+    def test_tolerance_budget_follows_resolution(self):
+        """Test that a tolerance stops generation early, using more points for finer grids."""
+        kwargs = dict(engine="numpy", seed=4, mode="density", tolerance=0.1, max_points=1 << 26)
+        small = FractalFern(bins=(30, 45), **kwargs)
+        large = FractalFern(bins=(240, 360), **kwargs)
+        self.assertEqual(small.generate_points().sum(), small.points_used)
+        large.generate_points()
+        self.assertLess(small.points_used, large.points_used)
+        self.assertLess(large.points_used, 1 << 26)
+        self.assertEqual(large._iterations(), large.points_used + 4096 * 20)
+        with self.assertRaises(ValueError):
+            FractalFern(engine="numpy", tolerance=0.1)
+
 if __name__ == '__main__':
     unittest.main()
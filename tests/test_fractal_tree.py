@@ -0,0 +1,99 @@
+import unittest
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from fractal_tree import FractalTree3D
+
+def make_tree(**kwargs):
+    params = dict(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                  depth=5, branch_angle=np.pi / 4, scale_factor=0.5)
+    params.update(kwargs)
+    return FractalTree3D(**params)
+
+class TestFractalTree3D(unittest.TestCase):
+    def test_branch_count(self):
+        """Test that the preallocated arrays hold 1 + 4 + ... + 4**(depth - 1) branches."""
+        tree = make_tree(depth=5)
+        tree.generate_points()
+        self.assertEqual(tree.starts.shape, (341, 3))
+        self.assertEqual(tree.ends.shape, (341, 3))
+        self.assertEqual(len(tree.branches), 341)
+        self.assertEqual(np.bincount(tree.levels).tolist(), [1, 4, 16, 64, 256])
+
+    def test_vectorized_matches_recursive(self):
+        """Test that the level-by-level engine reproduces the recursive engine, level by level."""
+        vectorized = make_tree(depth=5)
+        vectorized.generate_points()
+        recursive = make_tree(depth=5, engine="recursive")
+        recursive.generate_points()
+        for level in range(5):
+            np.testing.assert_allclose(vectorized.starts[vectorized.levels == level],
+                                       recursive.starts[recursive.levels == level], atol=1e-12)
+            np.testing.assert_allclose(vectorized.ends[vectorized.levels == level],
+                                       recursive.ends[recursive.levels == level], atol=1e-12)
+
+    def test_branches_view(self):
+        """Test that branches still yields (start, end) pairs."""
+        tree = make_tree(depth=2)
+        tree.generate_points()
+        base, end = tree.branches[0]
+        np.testing.assert_array_equal(base, [0, 0, 0])
+        np.testing.assert_allclose(end, [0.001, 0.001, 1])
+        self.assertEqual(len(list(tree.branches)), 5)
+
+    def test_depth_zero(self):
+        """Test that a tree of depth zero has no branches."""
+        tree = make_tree(depth=0)
+        tree.generate_points()
+        self.assertEqual(len(tree.branches), 0)
+
+    def test_plot_uses_single_collection(self):
+        """Test that all branches are drawn by one collection with widths by level."""
+        tree = make_tree(depth=4)
+        tree.generate_points()
+        fig = plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+        tree.plot(ax=ax)
+        self.assertEqual(len(ax.lines), 0)
+        self.assertEqual(len(ax.collections), 1)
+        widths = ax.collections[0].get_linewidths()
+        self.assertEqual(len(widths), 85)
+        self.assertEqual((widths[0], widths[-1]), (4, 1))
+        plt.close(fig)
+
+    def test_instanced_engine(self):
+        """Test that the instanced engine keeps the branch count, lengths and first two levels."""
+        vectorized = make_tree(depth=5)
+        vectorized.generate_points()
+        instanced = make_tree(depth=5, engine="instanced")
+        instanced.generate_points()
+        self.assertEqual(np.bincount(instanced.levels).tolist(), [1, 4, 16, 64, 256])
+        for level in range(5):
+            lengths = [np.linalg.norm(tree.ends[tree.levels == level] - tree.starts[tree.levels == level], axis=1)
+                       for tree in (vectorized, instanced)]
+            np.testing.assert_allclose(*lengths)
+        for level in range(2):
+            np.testing.assert_allclose(instanced.ends[instanced.levels == level],
+                                       vectorized.ends[vectorized.levels == level], atol=1e-12)
+
+    def test_instanced_deepen_and_chunks(self):
+        """Test that deepening matches a fresh deeper tree and that chunks follow materialize()."""
+        instances = make_tree(depth=4).instanced(subtree_depth=2)
+        instances.deepen(2)
+        expected = make_tree(depth=6).instanced(subtree_depth=4)
+        for actual, wanted in zip(instances.materialize(), expected.materialize()):
+            np.testing.assert_allclose(actual, wanted, atol=1e-12)
+        self.assertEqual(instances.branch_count(), FractalTree3D.branch_count(6))
+        self.assertLess(instances.nbytes, instances.branch_count() * 6 * 8)
+        starts, ends, _ = instances.materialize()
+        rows = np.concatenate(list(instances.iter_chunks(1000)))
+        np.testing.assert_array_equal(rows, np.concatenate([starts, ends], axis=1))
+
+    def test_invalid_engine(self):
+        """Test that an unknown engine raises a ValueError."""
+        with self.assertRaises(ValueError):
+            make_tree(engine="gpu")
+
+if __name__ == '__main__':
+    unittest.main()
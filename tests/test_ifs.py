@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from ifs import IFS, PRESETS
+from fractal_fern import FractalFern, FERN_COEFFICIENTS
+
+class TestIFS(unittest.TestCase):
+    def test_invalid_coefficient_shape(self):
+        """Test that coefficients not shaped (n, 2, 3) raise a ValueError."""
+        with self.assertRaises(ValueError):
+            IFS(np.zeros((2, 3, 3)))
+
+    def test_invalid_probabilities(self):
+        """Test that mismatched or negative probabilities raise a ValueError."""
+        with self.assertRaises(ValueError):
+            IFS(PRESETS["sierpinski"], [0.5, 0.5])
+        with self.assertRaises(ValueError):
+            IFS(PRESETS["sierpinski"], [0.5, 0.6, -0.1])
+
+    def test_probabilities_are_normalized(self):
+        """Test that probability weights are normalized to sum to 1."""
+        ifs = IFS(PRESETS["sierpinski"], [1, 1, 2])
+        np.testing.assert_allclose(ifs.probabilities, [0.25, 0.25, 0.5])
+
+    def test_area_probabilities(self):
+        """Test that automatic probabilities follow |det| with a floor for degenerate maps."""
+        probabilities = IFS.area_probabilities(FERN_COEFFICIENTS)
+        self.assertAlmostEqual(probabilities.sum(), 1.0)
+        self.assertTrue(np.all(probabilities > 0))
+        self.assertEqual(int(np.argmax(probabilities)), 0)
+        np.testing.assert_allclose(IFS(PRESETS["sierpinski"]).probabilities, [1 / 3] * 3)
+
+    def test_sierpinski_points_inside_triangle(self):
+        """Test that Sierpinski points stay inside the unit triangle."""
+        x, y = IFS(PRESETS["sierpinski"]).generate(10000, seed=0)
+        self.assertTrue(np.all(y >= 0.0) and np.all(y <= 1.0))
+        self.assertTrue(np.all(x >= y / 2 - 1e-12) and np.all(x <= 1.0 - y / 2 + 1e-12))
+
+    def test_fern_is_ifs_preset(self):
+        """Test that FractalFern produces the same points as the equivalent IFS."""
+        fern = FractalFern(points=6000, engine="numpy", seed=2)
+        x, y = fern.generate_points()
+        x_ifs, y_ifs = IFS(FERN_COEFFICIENTS, [0.85, 0.07, 0.07, 0.01]).generate(6000, seed=2)
+        np.testing.assert_array_equal(x, x_ifs)
+        np.testing.assert_array_equal(y, y_ifs)
+
+    def test_region_density_matches_full_density(self):
+        """Test that the region sampler estimates the same measure as the full chaos game."""
+        fern = IFS(FERN_COEFFICIENTS, [0.85, 0.07, 0.07, 0.01])
+        window = (0.0, 1.0, 4.5, 5.5)
+        full = fern.generate_density(1 << 22, (4, 4), window, seed=1) / (1 << 22)
+        counts, mass = fern.generate_region_density(window, 1 << 18, (4, 4), seed=2)
+        region = counts * mass / (1 << 18)
+        np.testing.assert_allclose(region.sum(), full.sum(), rtol=0.05)
+        np.testing.assert_allclose(region, full, atol=0.1 * full.max())
+        # Most region samples land in the window, unlike the 2% of the full run.
+        self.assertGreater(counts.sum(), 0.5 * (1 << 18))
+
+    def test_converged_density_meets_tolerance(self):
+        """Test that halving the tolerance needs more points and brings the image closer to a long run."""
+        fern = IFS(FERN_COEFFICIENTS, [0.85, 0.07, 0.07, 0.01])
+        extent = (-2.2, 2.7, 0.0, 10.0)
+        reference = fern.generate_density(1 << 23, (40, 60), extent, seed=0)
+        errors, budgets = [], []
+        for tolerance in (0.2, 0.05):
+            density, points, iterations = fern.generate_converged_density((40, 60), extent, tolerance, seed=1)
+            self.assertEqual(density.sum(), points)
+            self.assertEqual(iterations, points + 4096 * 20)
+            errors.append(np.abs(density / points - reference / reference.sum()).sum())
+            budgets.append(points)
+        self.assertLess(budgets[0], budgets[1])
+        self.assertLess(errors[1], errors[0])
+
+    def test_address_cover_leaves_are_small(self):
+        """Test that the cover's pieces shrink with the window and carry address weights."""
+        sierpinski = IFS(PRESETS["sierpinski"])
+        maps, weights = sierpinski.address_cover((0.1, 0.11, 0.01, 0.02), extent=(0, 1, 0, 1))
+        scales = np.abs(np.linalg.det(maps[:, :, :2])) ** 0.5
+        self.assertTrue(np.all(scales <= 0.25 * 0.01))
+        np.testing.assert_allclose(weights, scales ** (np.log(3) / np.log(2)))
+
+if __name__ == '__main__':
+    unittest.main()
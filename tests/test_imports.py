@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestImports(unittest.TestCase):
+    def test_core_modules_do_not_import_matplotlib(self):
+        """Test that generating geometry does not load matplotlib."""
+        code = ("import sys\n"
+                "import fractal_fern, fractal_tree, seashell, ifs, cache, sinks, export\n"
+                "fractal_fern.FractalFern(points=1000, engine='numpy').generate_points()\n"
+                "print('matplotlib' in sys.modules)\n")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import contextlib
+import io
+import logging
+import unittest
+import numpy as np
+import instrument
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.clear_hooks()
+
+    def test_silent_by_default(self):
+        """Test that generation prints nothing when no hook is installed."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            FractalFern(points=5000, engine="numpy").generate_points()
+        self.assertEqual(output.getvalue(), "")
+        self.assertFalse(instrument.enabled())
+
+    def test_span_counters_and_rates(self):
+        """Test that generate_points reports a span with counters and rates."""
+        events = []
+        instrument.add_hook(events.append)
+        FractalFern(points=6000, engine="numpy", seed=0).generate_points()
+        spans = [event for event in events if event.kind == "span"]
+        self.assertEqual([span.name for span in spans], ["fern.generate"])
+        self.assertEqual(spans[0].counters["points"], 6000)
+        self.assertGreater(spans[0].counters["iterations"], 6000)
+        self.assertGreater(spans[0].rates["points_per_s"], 0)
+
+    def test_progress_reports_completion(self):
+        """Test that progress events end with the task complete."""
+        events = []
+        instrument.add_hook(events.append)
+        tree = FractalTree3D(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                             depth=4, branch_angle=np.pi / 4, scale_factor=0.5)
+        tree.generate_points()
+        reports = [event for event in events if event.kind == "progress"]
+        self.assertEqual((reports[-1].done, reports[-1].total), (85, 85))
+        self.assertEqual(reports[-1].fraction, 1.0)
+
+    def test_log_to(self):
+        """Test that log_to forwards spans to a logger."""
+        logger = logging.getLogger("test_instrument")
+        with self.assertLogs(logger, level="INFO") as logs:
+            instrument.log_to(logger)
+            with instrument.span("phase", items=3):
+                pass
+        self.assertIn("phase", logs.output[0])
+        self.assertIn("items=3", logs.output[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from fractal_tree import FractalTree3D
+from lod import cull_tree, thin_points, tree_lod_depth
+
+def make_tree(depth):
+    return FractalTree3D(np.array([0, 0, 0]), 1, np.array([0.001, 0.001, 1]), depth, np.pi / 4, 0.5)
+
+class TestLOD(unittest.TestCase):
+    def test_thin_points_limits_points_per_pixel(self):
+        """Test that at most per_pixel points are kept per pixel, earliest first."""
+        points = np.random.default_rng(0).random((20000, 2))
+        for per_pixel in (1, 3):
+            keep = thin_points(points, figsize=(1, 1), dpi=10, per_pixel=per_pixel)
+            pixels = np.minimum(np.floor(points[keep] * 10), 9)
+            _, counts = np.unique(pixels, axis=0, return_counts=True)
+            self.assertEqual(counts.max(), per_pixel)
+            self.assertEqual(len(keep), 100 * per_pixel)
+            self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertEqual(thin_points(points[:5], figsize=(1, 1), dpi=1000).tolist(), [0, 1, 2, 3, 4])
+
+    def test_tree_depth_follows_resolution(self):
+        """Test that the drawn depth grows with the DPI and stops at the tree's depth."""
+        tree = make_tree(12)
+        depths = [tree_lod_depth(tree, (8, 6), dpi, (10, 60)) for dpi in (10, 100, 10000)]
+        self.assertEqual(depths, sorted(depths))
+        self.assertLess(depths[0], 12)
+        self.assertEqual(depths[-1], 12)
+
+    def test_plot_culls_subpixel_subtrees(self):
+        """Test that plotting with a threshold draws only the visible levels."""
+        tree = make_tree(8)
+        tree.generate_points()
+        fig = plt.figure(figsize=(2, 2), dpi=20)
+        ax = fig.add_subplot(111, projection='3d')
+        tree.plot(ax=ax, lod_threshold=1)
+        visible = cull_tree(tree, (2, 2), 20, (10, 60))
+        self.assertLess(visible.sum(), len(tree.starts))
+        self.assertEqual(len(ax.collections[0].get_linewidths()), visible.sum())
+        plt.close(fig)
+
+if __name__ == '__main__':
+    unittest.main()
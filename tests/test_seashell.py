@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from seashell import DoubleSeashell
+
+def make_shell(**kwargs):
+    params = dict(a=0.1, b=0.2, c=0.15, n_turns=3, n_turns_inv=2, thickness=0.05, points=50)
+    params.update(kwargs)
+    return DoubleSeashell(**params)
+
+def reference_points(shell):
+    """Point-by-point construction the vectorized generator must reproduce."""
+    theta = np.linspace(0, 2 * np.pi * shell.n_turns, shell.points)
+    r = shell.a + shell.b * theta
+    theta_inv = np.linspace(0, 2 * np.pi * shell.n_turns_inv, shell.points)
+    r_inv = np.linspace(shell.a + shell.b * theta[-1], shell.a, shell.points)
+    paths = [(r * np.cos(theta), r * np.sin(theta), shell.c * theta),
+             (r_inv * np.cos(theta_inv), r_inv * np.sin(theta_inv), shell.c * theta_inv + shell.c * theta[-1])]
+    xs, ys, zs = [], [], []
+    for x, y, z in paths:
+        for xi, yi, zi in zip(x, y, z):
+            for t in np.linspace(0, 2 * np.pi, shell.ring_samples):
+                xs.append(xi + shell.thickness * np.cos(t))
+                ys.append(yi + shell.thickness * np.sin(t))
+                zs.append(zi)
+    return xs, ys, zs
+
+class TestDoubleSeashell(unittest.TestCase):
+    def test_points_shape(self):
+        """Test that the shell has 2 * points * ring_samples contiguous points."""
+        shell = make_shell(points=200, ring_samples=12)
+        x, y, z = shell.generate_points()
+        for coords in (x, y, z):
+            self.assertIsInstance(coords, np.ndarray)
+            self.assertEqual(coords.shape, (2 * 200 * 12,))
+            self.assertTrue(coords.flags['C_CONTIGUOUS'])
+
+    def test_matches_reference_loop(self):
+        """Test that the broadcast construction matches the point-by-point loop."""
+        shell = make_shell(ring_samples=7)
+        shell.generate_points()
+        xs, ys, zs = reference_points(shell)
+        np.testing.assert_allclose(shell.x_shell, xs)
+        np.testing.assert_allclose(shell.y_shell, ys)
+        np.testing.assert_allclose(shell.z_shell, zs)
+
+    def test_mesh_shape(self):
+        """Test that mesh mode shares ring vertices and emits 2 triangles per quad."""
+        shell = make_shell(points=40, ring_samples=8, mode="mesh")
+        vertices, triangles = shell.generate_points()
+        self.assertEqual(vertices.shape, (2 * 40 * 8, 3))
+        self.assertEqual(triangles.shape, (2 * 39 * 2 * 8, 3))
+        self.assertEqual(triangles.min(), 0)
+        self.assertEqual(triangles.max(), len(vertices) - 1)
+
+    def test_mesh_rings_perpendicular_to_spiral(self):
+        """Test that mesh rings have radius thickness and lie perpendicular to the spiral."""
+        shell = make_shell(points=100, ring_samples=6, mode="mesh")
+        vertices, _ = shell.generate_points()
+        x, y, z = shell._spiral_paths()
+        centres = np.repeat(np.stack([x, y, z], axis=1), 6, axis=0)
+        offsets = vertices - centres
+        np.testing.assert_allclose(np.linalg.norm(offsets, axis=1), shell.thickness)
+        tangent = np.gradient(np.stack([x, y, z], axis=1)[:100], axis=0)
+        tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+        dots = np.sum(offsets[:600].reshape(100, 6, 3) * tangent[:, None, :], axis=2)
+        np.testing.assert_allclose(dots, 0, atol=1e-9)
+
+    def test_invalid_ring_samples(self):
+        """Test that a non-positive ring_samples raises a ValueError."""
+        with self.assertRaises(ValueError):
+            make_shell(ring_samples=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from fractal_fern import FractalFern
+from fractal_tree import FractalTree3D
+from seashell import DoubleSeashell
+from sinks import BinaryFileSink, MemmapSink, write_chunks
+
+def sorted_rows(rows):
+    return rows[np.lexsort(rows.T[::-1])]
+
+class TestChunksAndSinks(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_fern_chunks_match_generate_points(self):
+        """Test that fern chunks have a fixed size and concatenate to generate_points()."""
+        fern = FractalFern(points=7000, engine="numpy", seed=3)
+        x, y = fern.generate_points()
+        chunks = list(fern.iter_chunks(1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000] * 7)
+        np.testing.assert_array_equal(np.concatenate(chunks), np.stack([x, y], axis=1))
+
+    def test_seashell_chunks_match_generate_points(self):
+        """Test that seashell chunks concatenate to the point cloud of generate_points()."""
+        shell = DoubleSeashell(a=0.1, b=0.2, c=0.15, n_turns=3, n_turns_inv=2, thickness=0.05, points=77)
+        x, y, z = shell.generate_points()
+        chunks = list(shell.iter_chunks(50))
+        self.assertTrue(all(len(chunk) == 50 for chunk in chunks[:-1]))
+        np.testing.assert_array_equal(np.concatenate(chunks), np.stack([x, y, z], axis=1))
+
+    def test_tree_chunks_cover_every_branch(self):
+        """Test that tree chunks hold the same branches as generate_points()."""
+        tree = FractalTree3D(base=np.array([0, 0, 0]), length=1, direction=np.array([0.001, 0.001, 1]),
+                             depth=5, branch_angle=np.pi / 4, scale_factor=0.5)
+        tree.generate_points()
+        chunks = np.concatenate(list(tree.iter_chunks(64)))
+        expected = np.concatenate([tree.starts, tree.ends], axis=1)
+        np.testing.assert_allclose(sorted_rows(chunks.round(9)), sorted_rows(expected.round(9)))
+
+    def test_memmap_sink(self):
+        """Test that a memmap sink receives every block in order."""
+        fern = FractalFern(points=6000, engine="numpy", seed=4)
+        path = os.path.join(self.directory, "fern.f64")
+        with MemmapSink(path, rows=fern.points, columns=2) as sink:
+            self.assertEqual(write_chunks(fern.iter_chunks(1024), sink), 6000)
+        stored = np.fromfile(path).reshape(-1, 2)
+        np.testing.assert_array_equal(stored, np.stack(fern.generate_points(), axis=1))
+
+    def test_binary_file_sink_appends(self):
+        """Test that a binary file sink converts blocks and can append."""
+        path = os.path.join(self.directory, "points.f32")
+        with BinaryFileSink(path, dtype=np.float32) as sink:
+            write_chunks([np.ones((3, 2)), np.zeros((2, 2))], sink)
+        with BinaryFileSink(path, dtype=np.float32, append=True) as sink:
+            sink.write(np.full((1, 2), 7.0))
+        stored = np.fromfile(path, dtype=np.float32).reshape(-1, 2)
+        np.testing.assert_array_equal(stored[:, 0], [1, 1, 1, 0, 0, 7])
+
+if __name__ == '__main__':
+    unittest.main()
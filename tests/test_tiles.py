@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+import zlib
+import numpy as np
+from tiles import TileRenderer, TileServer, encode_png
+
+class TestTiles(unittest.TestCase):
+    def setUp(self):
+        self.renderer = TileRenderer(tile_size=32, points=1 << 14)
+
+    def test_encode_png(self):
+        """Test that the PNG encoder stores each row after a zero filter byte."""
+        image = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+        data = encode_png(image)
+        self.assertTrue(data.startswith(b"\x89PNG\r\n\x1a\n"))
+        start = data.index(b"IDAT") + 4
+        raw = zlib.decompress(data[start:data.index(b"IEND") - 8])
+        self.assertEqual(raw, b"\x00" + image[0].tobytes() + b"\x00" + image[1].tobytes())
+
+    def test_tile_windows_split_the_square(self):
+        """Test that the four tiles of zoom 1 split the zoom 0 tile."""
+        xmin, xmax, ymin, ymax = self.renderer.window(0, 0, 0)
+        self.assertAlmostEqual(xmax - xmin, ymax - ymin)
+        self.assertEqual(self.renderer.window(1, 0, 0)[::3], (xmin, ymax))
+        self.assertEqual(self.renderer.window(1, 1, 1)[1:3], (xmax, ymin))
+        with self.assertRaises(ValueError):
+            self.renderer.window(1, 2, 0)
+
+    def test_server_caches_tiles(self):
+        """Test that the server renders a tile once, evicts the least recently used one and rejects bad paths."""
+        server = TileServer(self.renderer, cache_tiles=1)
+
+        async def run():
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+
+            async def get(path):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response.split(b"\r\n")[0], response.split(b"\r\n\r\n", 1)[1]
+
+            first, second = await asyncio.gather(get("/2/1/1.png"), get("/2/1/1.png"))
+            await get("/2/1/2.png")
+            missing = await get("/2/9/9.png")
+            listener.close()
+            await listener.wait_closed()
+            return first, second, missing
+
+        first, second, missing = asyncio.run(run())
+        self.assertEqual(first[0], b"HTTP/1.1 200 OK")
+        self.assertEqual(first, second)
+        self.assertTrue(first[1].startswith(b"\x89PNG"))
+        self.assertEqual(missing[0], b"HTTP/1.1 404 Not Found")
+        self.assertEqual(list(server._tiles), [(2, 1, 2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# tiles.py
+
+# Copyright (C) [2024] [Vino Gupta]
+# This program is free software; you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation; either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program; if not, see <https://www.gnu.org/licenses>.
+# Additional permission under GNU GPL version 3 section 7
+# If you modify this Program, or any covered work, by linking or combining it with generate_fractals (or a modified version of that library), containing parts covered by the terms of GPL v3.0, the licensors of this Program grant you additional permission to convey the resulting work. {Corresponding Source for a non-source form of such a combination shall include the source code for the parts of generate_fractals used as well as that of the covered work.}
+
+# =====================
+# Deep-zoom tile server
+# Serves z/x/y density tiles of the fern (or any IFS) as PNG images over HTTP, for
+# slippy-map viewers such as Leaflet:
+#
+#   python tiles.py --port 8000
+#   curl http://127.0.0.1:8000/3/2/5.png -o tile.png
+#
+# Zoom level z splits a square around the attractor into 2**z by 2**z tiles, with
+# tile (0, 0) in the top-left corner. Each tile is rendered with
+# IFS.generate_region_density(), so it costs about the same at every zoom level, and
+# rendered tiles are kept in an in-memory least-recently-used cache.
+# =====================
+
+import argparse
+import asyncio
+from collections import OrderedDict
+import re
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from fractal_fern import FERN_EXTENT, FractalFern
+from instrument import timed
+
+# Colours of empty and of saturated pixels (the ends of matplotlib's 'Greens').
+LOW_COLOR = (247, 252, 245)
+HIGH_COLOR = (0, 68, 27)
+
+_TILE_PATH = re.compile(r"^/(\d+)/(\d+)/(\d+)\.png$")
+
+
+def encode_png(image):
+    """
+    Encodes an RGB image as PNG bytes.
+
+    Parameters:
+    - image: uint8 array of shape (height, width, 3); row 0 is the top row.
+    """
+    height, width, _ = image.shape
+    # Every scanline starts with filter type 0 (none).
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+
+class TileRenderer:
+    def __init__(self, ifs=None, extent=None, tile_size=256, points=1 << 18, seed=0, reference=64.0,
+                 max_zoom=32):
+        """
+        Renders density tiles of an IFS attractor.
+
+        Parameters:
+        - ifs: The IFS to render; defaults to the Barnsley fern.
+        - extent: (xmin, xmax, ymin, ymax) that zoom level 0 must show. It is widened
+          to a square on its longer side. Defaults to FERN_EXTENT for the default fern
+          and to ifs.estimate_extent() otherwise.
+        - tile_size: Width and height of a tile in pixels.
+        - points: Points sampled per tile.
+        - seed: Base seed; each tile draws from its own stream derived from it.
+        - reference: Density, relative to a uniform spread over the whole square, that
+          is drawn at full strength. Tiles of a zoom level share this scale, so they
+          join up without seams.
+        - max_zoom: Deepest zoom level served; beyond about 40 levels the tiles fall
+          below float64 resolution.
+        """
+        if ifs is None:
+            ifs = FractalFern(engine="numpy")
+            extent = FERN_EXTENT if extent is None else extent
+        if extent is None:
+            extent = ifs.estimate_extent()
+        if tile_size <= 0 or points <= 0:
+            raise ValueError("Tile size and points must be positive")
+        xmin, xmax, ymin, ymax = extent
+        side = max(xmax - xmin, ymax - ymin)
+        self.ifs = ifs
+        self.attractor_extent = ifs.estimate_extent()
+        self.origin = ((xmin + xmax - side) / 2, (ymin + ymax + side) / 2)
+        self.side = side
+        self.tile_size = tile_size
+        self.points = points
+        self.seed = seed
+        self.reference = reference
+        self.max_zoom = max_zoom
+
+    def window(self, z, x, y):
+        """
+        Returns the (xmin, xmax, ymin, ymax) covered by tile (z, x, y).
+        """
+        if not 0 <= z <= self.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"No tile {z}/{x}/{y}")
+        size = self.side / 2 ** z
+        left, top = self.origin[0] + x * size, self.origin[1] - y * size
+        return (left, left + size, top - size, top)
+
+    def density(self, z, x, y):
+        """
+        Returns the density of tile (z, x, y) relative to a uniform spread of the
+        invariant measure over the zoom level's square, top row first.
+        """
+        window = self.window(z, x, y)
+        seed = np.random.SeedSequence([self.seed, z, x, y])
+        counts, mass = self.ifs.generate_region_density(window, self.points, (self.tile_size, self.tile_size),
+                                                        self.attractor_extent, seed=seed.generate_state(1)[0])
+        pixels = (2 ** z * self.tile_size) ** 2
+        return (counts[::-1] * (mass * pixels / self.points)).astype(np.float64)
+
+    @timed("tiles.render", lambda self: {"points": self.points})
+    def render(self, z, x, y):
+        """
+        Renders tile (z, x, y) as PNG bytes, log tone mapped so that `reference` is
+        drawn at full strength.
+        """
+        level = np.minimum(np.log1p(self.density(z, x, y)) / np.log1p(self.reference), 1.0)[..., None]
+        image = (1 - level) * np.array(LOW_COLOR) + level * np.array(HIGH_COLOR)
+        return encode_png(np.round(image).astype(np.uint8))
+
+
+class TileServer:
+    def __init__(self, renderer, cache_tiles=512, executor=None):
+        """
+        Serves a TileRenderer's tiles over HTTP.
+
+        Parameters:
+        - renderer: The TileRenderer.
+        - cache_tiles: Number of rendered tiles kept in memory.
+        - executor: Optional concurrent.futures executor the tiles are rendered on;
+          the event loop's default thread pool if None.
+        """
+        if cache_tiles < 0:
+            raise ValueError("Cache size cannot be negative")
+        self.renderer = renderer
+        self.cache_tiles = cache_tiles
+        self.executor = executor
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict()
+        self._pending = {}
+
+    async def tile(self, z, x, y):
+        """
+        Returns the PNG bytes of tile (z, x, y) from the cache, rendering it if needed.
+        Concurrent requests for a tile being rendered wait for that render.
+        """
+        key = (z, x, y)
+        if key in self._tiles:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+        self.renderer.window(z, x, y)  # Raises ValueError for tiles outside the pyramid.
+        self.misses += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self.renderer.render, z, x, y)
+            self._pending[key] = future
+            future.add_done_callback(lambda done: self._store(key, done))
+        # Shielded so that a client hanging up does not cancel the render for others.
+        return await asyncio.shield(future)
+
+    def _store(self, key, future):
+        del self._pending[key]
+        if future.cancelled() or future.exception() is not None or self.cache_tiles == 0:
+            return
+        self._tiles[key] = future.result()
+        while len(self._tiles) > self.cache_tiles:
+            self._tiles.popitem(last=False)
+
+    async def handle(self, reader, writer):
+        """
+        Answers one HTTP request: GET /z/x/y.png.
+        """
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            match = _TILE_PATH.match(request[1]) if len(request) == 3 and request[0] == "GET" else None
+            if match is None:
+                status, body, content_type = "404 Not Found", b"Not found\n", "text/plain"
+            else:
+                try:
+                    body = await self.tile(*(int(group) for group in match.groups()))
+                    status, content_type = "200 OK", "image/png"
+                except ValueError:
+                    status, body, content_type = "404 Not Found", b"No such tile\n", "text/plain"
+            writer.write((f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                          "Cache-Control: max-age=86400\r\nAccess-Control-Allow-Origin: *\r\n"
+                          "Connection: close\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """
+        Starts listening and returns the asyncio Server.
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """
+        Serves tiles until cancelled.
+        """
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve z/x/y density tiles of the Barnsley fern.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--tile-size", type=int, default=256, help="Width and height of a tile in pixels")
+    parser.add_argument("--points", type=int, default=1 << 18, help="Points sampled per tile")
+    parser.add_argument("--cache-tiles", type=int, default=512, help="Number of rendered tiles kept in memory")
+    parser.add_argument("--seed", type=int, default=0, help="Base random seed")
+    args = parser.parse_args(argv)
+
+    renderer = TileRenderer(tile_size=args.tile_size, points=args.points, seed=args.seed)
+    server = TileServer(renderer, args.cache_tiles)
+    print(f"Serving tiles on http://{args.host}:{args.port}/{{z}}/{{x}}/{{y}}.png")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,3 +56,81 @@ def rotation_matrix_from_vectors(vec1, vec2):
     kmat = np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
     rotation_matrix = np.eye(3) + kmat + kmat.dot(kmat) * ((1 - c) / (s ** 2))
     return rotation_matrix
+
+
+def rotation_matrices_from_vectors(vec1, vec2):
+    """
+    Batched version of rotation_matrix_from_vectors: calculates the rotation matrices
+    that rotate vec1 to align with each row of vec2.
+
+    Parameters:
+    - vec1: Initial vector, shape (3,).
+    - vec2: Target vectors, shape (N, 3).
+    Returns:
+    - An (N, 3, 3) array of rotation matrices.
+    """
+    a = vec1 / np.linalg.norm(vec1)
+    b = vec2 / np.linalg.norm(vec2, axis=1, keepdims=True)
+    v = np.cross(a, b)
+    c = b @ a
+    kmat = np.zeros((len(b), 3, 3))
+    kmat[:, 0, 1], kmat[:, 0, 2] = -v[:, 2], v[:, 1]
+    kmat[:, 1, 0], kmat[:, 1, 2] = v[:, 2], -v[:, 0]
+    kmat[:, 2, 0], kmat[:, 2, 1] = -v[:, 1], v[:, 0]
+    # (1 - c) / s**2 == 1 / (1 + c) for unit vectors; the latter stays finite when
+    # a target is parallel to vec1, where the rotation is the identity.
+    factor = 1.0 / (1.0 + c)
+    return np.eye(3) + kmat + (kmat @ kmat) * factor[:, None, None]
+
+
+def rechunk(blocks, chunk_size):
+    """
+    Regroups a stream of 2D arrays with the same number of columns into blocks of exactly
+    chunk_size rows; the last block may be shorter.
+
+    Parameters:
+    - blocks: Iterable of (n_i, k) arrays.
+    - chunk_size: Number of rows per yielded block.
+    Yields:
+    - New (chunk_size, k) arrays.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    buffer, filled = None, 0
+    for block in blocks:
+        while len(block):
+            if buffer is None:
+                buffer, filled = np.empty((chunk_size,) + block.shape[1:], dtype=block.dtype), 0
+            count = min(chunk_size - filled, len(block))
+            buffer[filled:filled + count] = block[:count]
+            filled += count
+            block = block[count:]
+            if filled == chunk_size:
+                yield buffer
+                buffer = None
+    if buffer is not None and filled:
+        yield buffer[:filled]
+
+
+def linspace_slice(start, stop, num, lo, hi):
+    """
+    Returns np.linspace(start, stop, num)[lo:hi] without computing the whole array.
+    """
+    index = np.arange(lo, hi, dtype=np.float64)
+    if num > 1:
+        values = index * ((stop - start) / (num - 1)) + start
+        if hi == num and hi > lo:
+            values[-1] = stop
+        return values
+    return index * 0.0 + start
+
+
+def reusable(array, shape, dtype=np.float64):
+    """
+    Returns `array` when it is a writeable array of the given shape and dtype, so it can
+    be filled again in place, and a new empty array otherwise.
+    """
+    if (isinstance(array, np.ndarray) and array.shape == tuple(shape) and array.dtype == dtype
+            and array.flags.writeable and not isinstance(array, np.memmap)):
+        return array
+    return np.empty(shape, dtype=dtype)